@@ -0,0 +1,59 @@
+"""Seeded synthetic cohorts for the benchmarks.
+
+Every generator is deterministic for a given ``seed`` so runs are
+comparable against the stored baseline.
+"""
+import io
+import random
+import wave
+
+from screening.instruments import REGISTRY
+from screening.text import LEXICONS
+
+SAMPLE_RATE = 16000
+FILLER = ("lately", "at work", "most days", "with friends", "at home", "in the evenings", "when I am busy", "for a while now")
+
+
+def questionnaire_cohort(n, seed=0):
+    """``n`` fully answered response bytearrays."""
+    rng = random.Random(seed)
+    return [REGISTRY.encode({item_id: rng.randrange(len(REGISTRY.scale)) for item_id in REGISTRY.item_ids}) for _ in range(n)]
+
+
+def text_answer(rng):
+    # Stems like "worr*" are left bare; the lexicon regex still matches them
+    words = [w.rstrip("*") for w in rng.choice(list(LEXICONS.values()))]
+    parts = []
+    while sum(len(p) + 1 for p in parts) < 120:
+        parts.append(f"I feel {rng.choice(words)} {rng.choice(FILLER)} and {rng.choice(words)} {rng.choice(FILLER)}.")
+    return " ".join(parts)
+
+
+def text_cohort(n, seed=0):
+    """``n`` sessions of ``{item_id: answer}``, every answer over the 80 character minimum."""
+    rng = random.Random(seed)
+    return [{item_id: text_answer(rng) for item_id in REGISTRY.item_ids} for _ in range(n)]
+
+
+def wav_bytes(seconds=2.0, seed=0, sample_rate=SAMPLE_RATE):
+    """A mono 16-bit WAV of a gliding tone in noise, with pauses, unique per ``seed``."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = rng.uniform(90, 250) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(0.5, 3) * t))
+    signal = 0.4 * np.sin(2 * np.pi * np.cumsum(pitch) / sample_rate) + 0.05 * rng.standard_normal(t.size)
+    # Square-wave gating gives the voice activity detector speech and silence
+    signal *= (np.sin(2 * np.pi * rng.uniform(0.5, 2) * t) > -0.3)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes((np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def audio_cohort(n, seconds=2.0, seed=0):
+    """``n`` sessions of ``{item_id: wav bytes}`` with no clip repeated, so the feature memo never hits."""
+    return [{item_id: wav_bytes(seconds, seed=[seed, s, item_id]) for item_id in REGISTRY.item_ids} for s in range(n)]
@@ -0,0 +1,114 @@
+"""Headless page flows through app.py with Streamlit's ``AppTest``.
+
+Each flow goes welcome -> demographics -> mode selection -> assessment
+selection -> its input page -> results, with every instrument selected:
+
+* ``questionnaire``: every radio answered from a generated cohort.
+* ``text``: every text area filled from a generated cohort.
+* ``voice``: ``AppTest`` cannot drive ``st.file_uploader``, so generated
+  WAVs are put in the blob store under the session's id and their handles
+  seeded into ``audio_data``, as if they had been uploaded earlier.
+
+``sessions`` flows run side by side, one step at a time in turn, the way
+interleaved users share a Streamlit server process. Every ``AppTest.run``
+counts as one rerun latency. Peak memory per session is measured in a
+second pass under tracemalloc.
+"""
+import io
+import os
+import time
+
+from screening import blobstore
+from screening.instruments import REGISTRY
+
+from . import fixtures
+from .stats import peak_bytes, summary
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+FLOWS = ("questionnaire", "text", "voice")
+TIMEOUT = 120
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def _steps(kind, answers):
+    """Yield one callable per rerun; each acts on the ``AppTest`` and runs it."""
+    mode = {"questionnaire": ("btn_questionnaire", "chk_", "Start Assessment"),
+            "text": ("btn_text", "txt_chk_", "Start Text Assessment"),
+            "voice": ("btn_audio", "aud_chk_", "Start Audio Assessment")}[kind]
+    yield lambda at: at.run()
+    yield lambda at: _button(at, "I Understand - Proceed to Assessment").click().run()
+    yield _demographics
+    yield lambda at: _button(at, "Continue").click().run()
+    yield lambda at: at.button(key=mode[0]).click().run()
+    for inst in REGISTRY:
+        yield lambda at, inst=inst: at.checkbox(key=f"{mode[1]}{inst.id.lower()}").check().run()
+    yield lambda at: _button(at, mode[2]).click().run()
+    if kind == "questionnaire":
+        for item_id, rating in zip(REGISTRY.item_ids, answers):
+            yield lambda at, item_id=item_id, rating=rating: at.radio(key=f"q_{item_id}").set_value(rating).run()
+    elif kind == "text":
+        for item_id, answer in answers.items():
+            yield lambda at, item_id=item_id, answer=answer: at.text_area(key=f"txt_{item_id}").input(answer).run()
+    else:
+        yield lambda at: _seed_audio(at, answers).run()
+    yield lambda at: _button(at, "📊 View Results").click().run()
+
+
+def _demographics(at):
+    at.number_input[0].set_value(30)
+    next(s for s in at.selectbox if s.label == "Gender").select("Female")
+    return at.run()
+
+
+def _seed_audio(at, clips):
+    store = blobstore.get_store()
+    session_id = at.session_state["session_id"]
+    at.session_state["audio_data"] = {item_id: store.put(io.BytesIO(wav), session_id, name=f"{item_id}.wav") for item_id, wav in clips.items()}
+    return at
+
+
+def _cohort(kind, sessions, seed):
+    if kind == "questionnaire":
+        return fixtures.questionnaire_cohort(sessions, seed)
+    if kind == "text":
+        return fixtures.text_cohort(sessions, seed)
+    return fixtures.audio_cohort(sessions, seed=seed)
+
+
+def _interleave(kind, cohort, latencies=None):
+    from streamlit.testing.v1 import AppTest
+
+    tests = [AppTest.from_file(APP, default_timeout=TIMEOUT) for _ in cohort]
+    flows = [_steps(kind, answers) for answers in cohort]
+    active = list(range(len(tests)))
+    while active:
+        for i in list(active):
+            step = next(flows[i], None)
+            if step is None:
+                active.remove(i)
+                continue
+            t0 = time.perf_counter()
+            step(tests[i])
+            if latencies is not None:
+                latencies.append(time.perf_counter() - t0)
+    for at in tests:
+        page = at.session_state["page"]
+        if at.exception or page != "results":
+            raise RuntimeError(f"{kind} flow did not reach the results page: {at.exception or page}")
+        blobstore.get_store().release_session(at.session_state["session_id"])
+
+
+def run(flows=FLOWS, sessions=4, seed=0):
+    results = {}
+    for kind in flows:
+        latencies = []
+        start = time.perf_counter()
+        _interleave(kind, _cohort(kind, sessions, seed), latencies)
+        result = summary(latencies, time.perf_counter() - start, sessions)
+        result["reruns_per_flow"] = len(latencies) / sessions
+        result["peak_bytes_per_session"] = peak_bytes(_interleave, kind, _cohort(kind, sessions, seed + 1)) / sessions
+        results[f"flow_{kind}/{sessions}"] = result
+    return results
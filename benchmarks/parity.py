@@ -0,0 +1,82 @@
+"""Seeded parity check of cohort scoring against per-session scoring.
+
+    python -m benchmarks.parity [--sessions 2000] [--seed 0]
+
+Every generated session is scored with ``analyze_questionnaire`` and,
+as part of the whole cohort, with ``batch.score_batch`` plus
+``participant_result``. Both must give the same normalized scores and
+``SeverityLevel`` for every selected instrument. Sessions answer all, some
+or none of the items, so ``MISSING`` cells are covered. Each session
+selects a random subset of instruments. The cohort is scored as a uint8
+matrix and then as DataFrames of "3 - Often" labels keyed by question
+text, of ratings keyed by item id and of ratings keyed by the export's
+``Q01``-style columns. The check exits non-zero on the first mismatch.
+"""
+import argparse
+import random
+import sys
+
+from screening.instruments import MISSING, REGISTRY
+from screening.scoring import analyze_questionnaire
+
+ANSWERED_SHARES = (1.0, 0.9, 0.5, 0.0)
+
+
+def cohort(n, seed=0):
+    """``n`` ``(responses, selected_assessments)`` pairs with partial answers and random selections."""
+    rng = random.Random(seed)
+    instruments = list(REGISTRY.instruments)
+    sessions = []
+    for _ in range(n):
+        share = rng.choice(ANSWERED_SHARES)
+        ratings = {item_id: rng.randrange(len(REGISTRY.scale)) for item_id in REGISTRY.item_ids if rng.random() < share}
+        sessions.append((REGISTRY.encode(ratings), rng.sample(instruments, rng.randint(1, len(instruments)))))
+    return sessions
+
+
+def _frames(responses):
+    import pandas as pd
+
+    rows = [[None if r == MISSING else r for r in row] for row in responses]
+    labels = [[None if r is None else REGISTRY.options[r] for r in row] for row in rows]
+    return {
+        "labels by question": pd.DataFrame(labels, columns=list(REGISTRY.questions)),
+        "ratings by item id": pd.DataFrame(rows, columns=list(REGISTRY.item_ids)),
+        "ratings by export column": pd.DataFrame(rows, columns=[f"Q{item_id:02d}" for item_id in REGISTRY.item_ids]),
+    }
+
+
+def check(sessions):
+    """Mismatches between batch and per-session scoring, as human-readable lines."""
+    from screening import batch  # numpy, pandas
+
+    responses = [r for r, _ in sessions]
+    expected = [analyze_questionnaire(r, selected) for r, selected in sessions]
+    inputs = {"uint8 matrix": batch.encode_cohort(responses)}
+    inputs.update(_frames(responses))
+    mismatches = []
+    for name, matrix in inputs.items():
+        scored = batch.score_batch(matrix)
+        for row, (_, selected) in enumerate(sessions):
+            got = batch.participant_result(scored, row, selected)
+            if got != expected[row]:
+                mismatches.append(f"{name}, row {row}: {got!r} != {expected[row]!r}")
+                break
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    mismatches = check(cohort(args.sessions, args.seed))
+    if mismatches:
+        print("FAIL\n  " + "\n  ".join(mismatches))
+        return 1
+    print(f"OK: {args.sessions} sessions match analyze_questionnaire")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Benchmark suite: scorer micro-benchmarks and headless page flows.
+
+    python -m benchmarks.run [--only scoring|flows] [--sizes 100,1000,10000] [--sessions 4]
+                             [--save-baseline] [--tolerance 0.25] [--out results.json]
+
+Prints throughput, p50/p99 latency and peak memory per session for every
+benchmark. If the baseline file exists, each metric is compared with it.
+The run fails when a latency, memory figure or rerun count grows by more
+than ``--tolerance``, or a throughput drops by more than that. Baselines
+are machine specific. Record one on the capacity-planning host with
+``--save-baseline``.
+"""
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+HIGHER_IS_BETTER = {"throughput_per_s"}
+
+
+def _ints(text):
+    return tuple(int(x) for x in text.split(",") if x)
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of ``results`` against ``baseline`` as human-readable lines."""
+    regressions = []
+    for name, measured in results.items():
+        for metric, value in measured.items():
+            reference = baseline.get(name, {}).get(metric)
+            if reference is None:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                worse = value < reference / (1 + tolerance)
+            else:
+                worse = value > reference * (1 + tolerance)
+            if worse:
+                regressions.append(f"{name} {metric}: {value:.6g} vs baseline {reference:.6g}")
+    return regressions
+
+
+def report(results):
+    print(f"{'benchmark':36s} {'per s':>12s} {'p50 ms':>10s} {'p99 ms':>10s} {'peak KiB':>10s}")
+    for name, m in results.items():
+        print(f"{name:36s} {m['throughput_per_s']:12.1f} {m['p50_s'] * 1000:10.3f} {m['p99_s'] * 1000:10.3f} {m['peak_bytes_per_session'] / 1024:10.1f}")
+
+
+def main(argv=None):
+    from . import flows, scoring
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", choices=("scoring", "flows"))
+    parser.add_argument("--sizes", type=_ints, default=scoring.SIZES, help="questionnaire/text cohort sizes")
+    parser.add_argument("--audio-sizes", type=_ints, default=scoring.AUDIO_SIZES)
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent sessions per page flow")
+    parser.add_argument("--flows", default=",".join(flows.FLOWS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--out", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.only != "flows":
+        results.update(scoring.run(args.sizes, args.audio_sizes, args.seed))
+    if args.only != "scoring":
+        results.update(flows.run(tuple(args.flows.split(",")), args.sessions, args.seed))
+    report(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline; run with --save-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print("FAIL\n  " + "\n  ".join(regressions))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Micro-benchmarks for the scoring functions on growing synthetic cohorts.
+
+Each analyzer is called once per session of the cohort, with every
+instrument selected. ``score_batch`` scores the same questionnaire cohort
+as one matrix for comparison. Audio cohorts are smaller because every clip
+goes through the feature-extraction pool. Peak memory is the tracemalloc
+peak of this process per session. Work done inside pool workers is not
+included.
+"""
+import random
+import time
+
+from screening import audio, text
+from screening.instruments import REGISTRY
+from screening.scoring import analyze_audio_responses, analyze_questionnaire, analyze_text_responses, calculate_severity
+
+from . import fixtures
+from .stats import peak_bytes, summary, time_calls
+
+SIZES = (100, 1000, 10000)
+AUDIO_SIZES = (1, 4)
+
+
+def _bench(func, cohort, memory_cohort=None):
+    """``time_calls`` on ``cohort`` plus peak bytes per session on ``memory_cohort``.
+
+    Analyzers that memoize their inputs get a second, unseen cohort for the
+    memory pass so it is not served from cache.
+    """
+    result = time_calls(func, cohort)
+    memory_cohort = cohort if memory_cohort is None else memory_cohort
+    result["peak_bytes_per_session"] = peak_bytes(lambda: [func(x) for x in memory_cohort]) / len(memory_cohort)
+    return result
+
+
+def _score_batch(cohort):
+    from screening import batch  # numpy
+
+    matrix = batch.encode_cohort(cohort)
+    t0 = time.perf_counter()
+    batch.score_batch(matrix)
+    elapsed = time.perf_counter() - t0
+    result = summary([elapsed], elapsed, len(cohort))
+    result["peak_bytes_per_session"] = peak_bytes(batch.score_batch, matrix) / len(cohort)
+    return result
+
+
+def run(sizes=SIZES, audio_sizes=AUDIO_SIZES, seed=0):
+    selected = list(REGISTRY.instruments)
+    results = {}
+    for n in sizes:
+        cohort = fixtures.questionnaire_cohort(n, seed)
+        results[f"analyze_questionnaire/{n}"] = _bench(lambda r: analyze_questionnaire(r, selected), cohort)
+        results[f"score_batch/{n}"] = _score_batch(cohort)
+
+        rng = random.Random(seed)
+        maxima = [inst.max_score for inst in REGISTRY]
+        scores = [(rng.randint(0, m), m) for m in (rng.choice(maxima) for _ in range(n))]
+        results[f"calculate_severity/{n}"] = _bench(lambda args: calculate_severity(*args), scores)
+
+        text.cache_clear()
+        results[f"analyze_text_responses/{n}"] = _bench(lambda r: analyze_text_responses(r, selected), fixtures.text_cohort(n, seed), fixtures.text_cohort(n, seed + 1))
+    for n in audio_sizes:
+        # Start the pool before timing so the first session doesn't pay for worker spawn
+        audio._get_pool()
+        results[f"analyze_audio_responses/{n}"] = _bench(lambda r: analyze_audio_responses(r, selected), fixtures.audio_cohort(n, seed=seed), fixtures.audio_cohort(n, seed=seed + 1))
+    return results
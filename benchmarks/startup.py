@@ -0,0 +1,93 @@
+"""Cold-start and per-rerun import budget for app.py.
+
+    python -m benchmarks.startup [--budget benchmarks/startup_budget.json]
+
+Three measurements, each in a fresh interpreter so nothing is warm:
+
+* ``cold_import_s``: executing app.py's own top-level imports (everything
+  except streamlit itself), plus a check that none of the heavy modules in
+  the budget's ``deferred_modules`` were pulled in.
+* ``first_run_s``: the first ``AppTest`` run of app.py, i.e. what a new
+  session process pays before the welcome page renders.
+* ``rerun_s``: median of subsequent reruns of the welcome page.
+
+Exits non-zero if any measurement is over budget.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+
+def app_imports():
+    """Source of app.py's top-level import statements, minus streamlit."""
+    with open(APP) as f:
+        tree = ast.parse(f.read())
+    nodes = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    nodes = [n for n in nodes if not (isinstance(n, ast.Import) and n.names[0].name == "streamlit")]
+    return "\n".join(ast.unparse(n) for n in nodes)
+
+
+def _run(code):
+    out = subprocess.run([sys.executable, "-c", textwrap.dedent(code)], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_cold_import(deferred):
+    code = f"""
+    import json, sys, time
+    t0 = time.perf_counter()
+    exec({app_imports()!r})
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({{"cold_import_s": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+    """
+    return _run(code)
+
+
+def measure_runs(reruns):
+    code = f"""
+    import json, statistics, time
+    from streamlit.testing.v1 import AppTest
+    t0 = time.perf_counter()
+    at = AppTest.from_file({APP!r}, default_timeout=60).run()
+    first = time.perf_counter() - t0
+    times = []
+    for _ in range({reruns}):
+        t0 = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t0)
+    print(json.dumps({{"first_run_s": first, "rerun_s": statistics.median(times)}}))
+    """
+    return _run(code)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", default=DEFAULT_BUDGET)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args(argv)
+    with open(args.budget) as f:
+        budget = json.load(f)
+
+    result = measure_cold_import(budget["deferred_modules"])
+    result.update(measure_runs(args.reruns))
+    failures = [f"{name}: {result[name]:.3f}s > {limit:.3f}s" for name, limit in budget["limits"].items() if result[name] > limit]
+    failures += [f"{m} imported at startup" for m in result["loaded"]]
+    for name in budget["limits"]:
+        print(f"{name:16s} {result[name]:8.3f}s  (budget {budget['limits'][name]:.3f}s)")
+    if failures:
+        print("FAIL\n  " + "\n  ".join(failures))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Latency, throughput and memory summaries shared by the benchmarks."""
+import time
+import tracemalloc
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of ``values`` (``q`` in 0-100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def summary(latencies, elapsed, count):
+    """Throughput (``count`` per second of ``elapsed``) and p50/p99 of ``latencies`` in seconds."""
+    return {
+        "throughput_per_s": count / elapsed if elapsed else float("inf"),
+        "p50_s": percentile(latencies, 50),
+        "p99_s": percentile(latencies, 99),
+    }
+
+
+def time_calls(func, inputs):
+    """Call ``func`` on each input; returns ``summary`` over the calls."""
+    latencies = []
+    start = time.perf_counter()
+    for item in inputs:
+        t0 = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - t0)
+    return summary(latencies, time.perf_counter() - start, len(latencies))
+
+
+def peak_bytes(func, *args):
+    """Peak Python heap allocated while running ``func(*args)``.
+
+    Measured in its own pass, since tracemalloc slows every allocation.
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,96 @@
+"""Cached CSS, HTML and figures for the Streamlit pages.
+
+Everything here is memoized per process with bounded LRU caches, so the
+strings and figures are built once per theme (and, for the risk chart, once
+per distinct set of scores) and shared by every session.
+"""
+import functools
+
+CACHE_ENTRIES = 256
+
+THEMES = {
+    'dark': {'bg_color': '#1e1e1e', 'text_color': '#e0e0e0', 'card_bg': '#2d2d2d', 'button_bg': '#4A90E2', 'disclaimer_bg': '#2a3f5f', 'plot_bg': '#2d2d2d'},
+    'light': {'bg_color': '#f8f9fa', 'text_color': '#2c3e50', 'card_bg': 'white', 'button_bg': '#4A90E2', 'disclaimer_bg': '#E8F4F8', 'plot_bg': 'white'},
+}
+
+DISORDER_COLORS = {'ADHD': '#4A90E2', 'SPCD': '#E67E22', 'ASD': '#9B59B6', 'Anxiety': '#F39C12', 'Depression': '#50C878'}
+
+WELCOME_HTML = """<div class="info-text"><p>This system is designed as a research prototype to assist healthcare professionals in screening for potential cognitive and mental health disorders through multimodal assessment.</p><p><strong>Target Conditions:</strong></p><ul><li>Attention Deficit Hyperactivity Disorder (ADHD)</li><li>Social Pragmatic Communication Disorder (SPCD)</li><li>Autism Spectrum Disorder (ASD)</li><li>Anxiety Disorders</li><li>Depression</li></ul></div>"""
+
+# Keyed on whether screening.db persistence is enabled, so participants are told the truth about storage
+CONSENT_HTML = {
+    False: """<div class="disclaimer-box"><h4>⚠️ Ethical Disclaimer and Informed Consent</h4><p><strong>This system provides support for self-assessment and clinical diagnosis.</strong></p><p><strong>Important Information:</strong></p><ul><li>Results should be interpreted by qualified healthcare professionals</li><li>This tool supports but does not replace comprehensive clinical evaluation</li><li>Data is processed locally and not stored or transmitted; voice recordings are kept in temporary files only until you return Home or the session expires</li></ul></div>""",
+    True: """<div class="disclaimer-box"><h4>⚠️ Ethical Disclaimer and Informed Consent</h4><p><strong>This system provides support for self-assessment and clinical diagnosis.</strong></p><p><strong>Important Information:</strong></p><ul><li>Results should be interpreted by qualified healthcare professionals</li><li>This tool supports but does not replace comprehensive clinical evaluation</li><li>Data is processed locally; responses and results are stored in a local research database and not transmitted. Voice recordings are kept in temporary files only until you return Home or the session expires</li></ul></div>""",
+}
+
+PRIVACY_HTML = {
+    False: """<div class="disclaimer-box"><p><strong>Privacy Notice:</strong> This information is used only for assessment purposes and is not stored or transmitted.</p></div>""",
+    True: """<div class="disclaimer-box"><p><strong>Privacy Notice:</strong> This information is used only for assessment purposes. It is stored with your results in a local research database and is not transmitted.</p></div>""",
+}
+
+
+@functools.lru_cache(maxsize=len(THEMES))
+def theme_css(theme):
+    bg_color, text_color, card_bg, button_bg, disclaimer_bg = (THEMES[theme][k] for k in ('bg_color', 'text_color', 'card_bg', 'button_bg', 'disclaimer_bg'))
+    return f"""<style>
+@media (max-width: 768px) {{
+    .main .block-container {{padding: 1rem !important;}}
+    .stButton>button {{padding: 0.4rem 1rem !important;font-size: 0.9rem !important;}}
+    h1 {{font-size: 1.5rem !important;}}
+    h2 {{font-size: 1.3rem !important;}}
+    h3 {{font-size: 1.1rem !important;}}
+    .result-card {{padding: 1rem !important;}}
+    .disclaimer-box {{padding: 0.75rem !important;}}
+}}
+@media (min-width: 769px) and (max-width: 1024px) {{
+    .main .block-container {{padding: 2rem !important;}}
+}}
+.main{{background-color:{bg_color}}}
+.stApp{{background-color:{bg_color}}}
+body{{color:{text_color}}}
+.stButton>button{{background-color:{button_bg};color:white;border-radius:5px;padding:0.5rem 2rem;border:none;font-weight:500}}
+.stButton>button:hover{{background-color:#357ABD}}
+.disclaimer-box{{background-color:{disclaimer_bg};border-left:4px solid #4A90E2;padding:1rem;border-radius:5px;margin:1rem 0;color:{text_color}!important}}
+.disclaimer-box p,.disclaimer-box strong,.disclaimer-box ul,.disclaimer-box li,.disclaimer-box h4{{color:{text_color}!important}}
+.result-card{{background-color:{card_bg};padding:1.5rem;border-radius:8px;box-shadow:0 2px 4px rgba(0,0,0,0.1);margin:1rem 0}}
+.result-card h4,.result-card p,.result-card strong{{color:{text_color}!important}}
+.metric-label{{font-size:0.9rem;color:#666;font-weight:500}}
+.metric-value{{font-size:2rem;font-weight:600;color:{text_color}}}
+h1,h2,h3{{color:{text_color}}}
+.info-text{{color:{text_color};line-height:1.6}}
+.stTextArea textarea{{background-color:{card_bg};color:{text_color}}}
+.stSelectbox div[data-baseweb="select"]{{background-color:{card_bg}}}
+.stRadio label{{color:{text_color}}}
+.char-counter{{color:{text_color};font-size:0.9rem;margin-top:5px}}
+</style>"""
+
+
+@functools.lru_cache(maxsize=len(THEMES))
+def footer_html(theme):
+    text_color = THEMES[theme]['text_color']
+    return f"""<div style='text-align:center;color:{text_color};font-size:0.85rem;'><p>Multimodal Cognitive Disorder Screening System | Research Prototype</p><p>© 2026 | IEEE Research Project</p></div>"""
+
+
+def scores_key(scores):
+    """Hashable key for a results['scores'] dict, in display order."""
+    return tuple(scores.items())
+
+
+@functools.lru_cache(maxsize=CACHE_ENTRIES)
+def risk_figure(theme, key):
+    """Horizontal risk bar chart for ``scores_key(results['scores'])``.
+
+    The returned figure is shared between sessions and must not be mutated.
+    Only building the figure is memoized: ``st.plotly_chart`` validates and
+    serializes whatever it is given (a dict or JSON string included) on
+    every call, so caching the serialized form would not save that work.
+    """
+    import plotly.graph_objects as go
+
+    disorders = [d for d, _ in key]
+    scores = [s for _, s in key]
+    plot_bg = THEMES[theme]['plot_bg']
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=disorders, x=scores, orientation='h', marker=dict(color=[DISORDER_COLORS.get(d, '#4A90E2') for d in disorders], line=dict(color='rgba(0,0,0,0.3)', width=1)), text=[f"{s:.1%}" for s in scores], textposition='auto'))
+    fig.update_layout(xaxis_title="Risk Likelihood", yaxis_title="", xaxis=dict(range=[0, 1], tickformat='.0%'), height=400, margin=dict(l=20, r=20, t=20, b=20), plot_bgcolor=plot_bg, paper_bgcolor=plot_bg)
+    return fig
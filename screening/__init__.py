@@ -0,0 +1,5 @@
+"""Scoring and analysis code shared by the Streamlit app and offline jobs."""
+from .instruments import REGISTRY
+from .scoring import SeverityLevel, calculate_severity, analyze_questionnaire, analyze_text_responses, analyze_audio_responses
+
+__all__ = ["REGISTRY", "SeverityLevel", "calculate_severity", "analyze_questionnaire", "analyze_text_responses", "analyze_audio_responses"]
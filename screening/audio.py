@@ -0,0 +1,206 @@
+"""Acoustic feature extraction for voice answers.
+
+Clips are decoded and analysed in a process pool so the Streamlit script
+thread only hands them off. A clip is either a blob store handle (workers
+memory-map the blob themselves) or raw bytes. Features are memoized by the
+clip's SHA-256, so reruns and re-uploads of the same file are free.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from . import blobstore, preprocess
+from .instruments import REGISTRY
+
+CACHE_SIZE = 1024
+MAX_WORKERS = int(os.environ.get("SCREENING_AUDIO_WORKERS", min(4, os.cpu_count() or 1)))
+# Upper bound on how long collect() waits for a request's clips, in seconds
+COLLECT_TIMEOUT = float(os.environ.get("SCREENING_AUDIO_TIMEOUT", 60))
+
+# Heuristic marker weights per disorder (from the instrument definition) until a trained model replaces them.
+AUDIO_MARKERS = {inst.id: inst.audio_markers for inst in REGISTRY}
+MARKER_NAMES = frozenset(['pause', 'monotony', 'pitch_lability', 'low_energy', 'fast_rate', 'slow_rate'])
+_unknown = {m for weights in AUDIO_MARKERS.values() for m in weights} - MARKER_NAMES
+if _unknown:
+    raise ValueError(f"unknown audio markers in instrument definition: {', '.join(sorted(_unknown))}")
+
+
+
+class ClipsIncomplete(Exception):
+    """Some clips have no features: still running (``"pending"``) or undecodable (``"failed"``)."""
+
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(", ".join(f"{item}: {reason}" for item, reason in missing.items()))
+
+    @property
+    def failed(self):
+        return [item for item, reason in self.missing.items() if reason == "failed"]
+
+    @property
+    def pending(self):
+        return [item for item, reason in self.missing.items() if reason == "pending"]
+
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+_pending = {}
+_pool = None
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_features(source):
+    """Stream a clip through the preprocessing pipeline (runs in a worker)."""
+    if isinstance(source, dict):
+        with blobstore.get_store().open(source) as mapped:
+            return preprocess.stream_features(mapped)
+    return preprocess.stream_features(source)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn, not fork: the Streamlit server is multi-threaded
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _submit(clip):
+    # Caller holds _lock. A worker that dies (OOM, a native crash) breaks the
+    # whole executor, so replace it and retry once on a fresh pool.
+    global _pool
+    from concurrent.futures.process import BrokenProcessPool
+
+    try:
+        return _get_pool().submit(extract_features, clip)
+    except BrokenProcessPool:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        return _get_pool().submit(extract_features, clip)
+
+
+def _store(key, features):
+    _cache[key] = features
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def _done(key, future):
+    with _lock:
+        _pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            _store(key, future.result())
+
+
+def _clip_key(clip):
+    return clip["sha256"] if isinstance(clip, dict) else content_hash(clip)
+
+
+def _schedule(clip):
+    key = _clip_key(clip)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return key, hit, None
+        future = _pending.get(key)
+        scheduled = future is None
+        if scheduled:
+            future = _submit(clip)
+            _pending[key] = future
+    if scheduled:
+        future.add_done_callback(lambda f: _done(key, f))
+    return key, None, future
+
+
+def submit(clip):
+    """Schedule feature extraction for a clip and return its content hash.
+
+    Returns immediately; the clip is only sent to the pool if it is neither
+    cached nor already in flight.
+    """
+    return _schedule(clip)[0]
+
+
+def cached_features(key):
+    with _lock:
+        return _cache.get(key)
+
+
+def _reschedule(key, clip, future):
+    with _lock:
+        if _pending.get(key) is future:
+            del _pending[key]
+    return _schedule(clip)
+
+
+def _wait(future, deadline):
+    return future.result(timeout=max(deadline - time.monotonic(), 0))
+
+
+def _missing_reason(error):
+    from concurrent.futures import TimeoutError
+
+    return "pending" if isinstance(error, TimeoutError) else "failed"
+
+
+def collect(clips, timeout=COLLECT_TIMEOUT):
+    """Return ``(features, missing)`` for ``{item: clip}``, waiting on the pool.
+
+    ``features`` maps items to their features. Waits at most ``timeout``
+    seconds in total; every other non-empty clip is in ``missing``, as
+    ``"pending"`` if it was not done in time (its result still lands in the
+    cache for the next call) or ``"failed"`` if it could not be decoded.
+    """
+    from concurrent.futures.process import BrokenProcessPool
+
+    deadline = time.monotonic() + timeout
+    scheduled = {item: (clip, _schedule(clip)) for item, clip in clips.items() if clip}
+    features, missing = {}, {}
+    for item, (clip, (key, hit, future)) in scheduled.items():
+        if hit is not None:
+            features[item] = hit
+            continue
+        try:
+            features[item] = _wait(future, deadline)
+        except BrokenProcessPool:
+            # The pool died under this clip; try once more on its replacement
+            key, hit, future = _reschedule(key, clip, future)
+            try:
+                features[item] = hit if hit is not None else _wait(future, deadline)
+            except Exception as e:
+                missing[item] = _missing_reason(e)
+        except Exception as e:
+            missing[item] = _missing_reason(e)
+    return features, missing
+
+
+def _clip01(x):
+    return min(max(x, 0.0), 1.0)
+
+
+def clip_markers(features):
+    """Map raw features onto 0-1 markers used by ``AUDIO_MARKERS``."""
+    rate, pitch = features['speech_rate'], features['pitch_variability']
+    return {
+        'pause': _clip01(features['pause_ratio']),
+        'monotony': 1.0 - _clip01(pitch / 4.0),
+        'pitch_lability': _clip01((pitch - 3.0) / 4.0),
+        'low_energy': _clip01((-20.0 - features['energy_db']) / 30.0),
+        'fast_rate': _clip01((rate - 3.0) / 3.0),
+        'slow_rate': _clip01((3.0 - rate) / 2.0),
+    }
+
+
+def clip_risk(features, disorder):
+    markers = clip_markers(features)
+    return sum(w * markers[m] for m, w in AUDIO_MARKERS[disorder].items())
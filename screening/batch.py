@@ -0,0 +1,136 @@
+"""Vectorized questionnaire scoring for whole cohorts.
+
+Responses are an N x items matrix laid out like the registry's response
+bytearray: one column per item in ``REGISTRY.item_ids`` order, grouped by
+instrument. Cells hold the 0-4 rating, or ``MISSING`` for an unanswered item.
+"""
+import numpy as np
+
+from .instruments import DISORDER_THRESHOLDS, MISSING, REGISTRY
+from .scoring import SeverityLevel
+
+SEVERITY_LABELS = np.array(["Low", "Medium", "High"])
+
+DISORDERS = [inst.id for inst in REGISTRY]
+ITEMS = list(REGISTRY.questions)
+# Items are contiguous per disorder, so each disorder is one reduceat segment
+DISORDER_OFFSETS = np.array([inst.start for inst in REGISTRY], dtype=np.intp)
+
+
+def encode_responses(responses):
+    """One session's response bytearray (or a ``{question: "3 - Often"}`` dict) as a uint8 row."""
+    if isinstance(responses, dict):
+        responses = REGISTRY.encode_labels(responses)
+    return np.frombuffer(bytes(responses), dtype=np.uint8)
+
+
+def encode_cohort(sessions):
+    """Encode an iterable of response bytearrays or dicts as an N x items uint8 matrix."""
+    rows = [encode_responses(r) for r in sessions]
+    if not rows:
+        return np.empty((0, len(ITEMS)), dtype=np.uint8)
+    return np.vstack(rows)
+
+
+def _column_item(column):
+    # Question text, item id (14 or "14") or the export's "Q14" column name
+    if isinstance(column, str) and column[:1] == "Q" and column[1:].isdigit():
+        column = column[1:]
+    return REGISTRY.resolve(column)
+
+
+def _frame_to_matrix(df):
+    import pandas as pd
+
+    positions = {}
+    for column in df.columns:
+        item_id = _column_item(column)
+        if item_id is not None:
+            positions.setdefault(REGISTRY.position[item_id], column)
+    if not positions:
+        raise ValueError("no questionnaire columns found; expected question text, item ids or Q01-style column names")
+    out = np.full((len(df), len(ITEMS)), MISSING, dtype=float)
+    for j, column in positions.items():
+        col = df[column]
+        if not pd.api.types.is_numeric_dtype(col):
+            col = pd.to_numeric(col.astype("string").str[0], errors="coerce")
+        values = col.to_numpy(dtype=float, na_value=np.nan)
+        out[:, j] = np.where(np.isnan(values), MISSING, values)
+    return out
+
+
+def _as_matrix(responses):
+    if hasattr(responses, "reindex"):
+        matrix = _frame_to_matrix(responses)
+    else:
+        matrix = np.asarray(responses)
+    if matrix.ndim != 2 or matrix.shape[1] != len(ITEMS):
+        raise ValueError(f"expected an N x {len(ITEMS)} response matrix, got shape {matrix.shape}")
+    # Anything but a 0-4 rating or MISSING would otherwise be summed into the raw score
+    bad = (matrix != MISSING) & ((matrix < 0) | (matrix >= len(REGISTRY.scale)) | (matrix % 1 != 0))
+    if bad.any():
+        row, col = np.argwhere(bad)[0]
+        raise ValueError(f"invalid rating {matrix[row, col]} for item {REGISTRY.item_ids[col]} in row {row}; expected 0-{len(REGISTRY.scale) - 1} or MISSING")
+    return matrix
+
+
+def score_batch(responses, thresholds=None):
+    """Score every disorder for every row of ``responses``.
+
+    ``responses`` is a uint8 matrix laid out as ``ITEMS`` or a DataFrame whose
+    columns are question strings, item ids or the export's ``Q01``-style
+    names (values may be ints or "3 - Often" strings; missing cells are
+    unanswered). Raises ``ValueError`` if a frame has none of those columns
+    or a cell is not a 0-4 rating or ``MISSING``. ``thresholds`` defaults to ``DISORDER_THRESHOLDS`` and can be
+    swapped to re-score archived sessions under new cut-offs.
+    """
+    thresholds = thresholds or DISORDER_THRESHOLDS
+    matrix = _as_matrix(responses)
+    values = np.where(matrix == MISSING, 0, matrix).astype(np.int32, copy=False)
+    if values.shape[0]:
+        raw = np.add.reduceat(values, DISORDER_OFFSETS, axis=1)
+    else:
+        raw = np.zeros((0, len(DISORDERS)), dtype=np.int32)
+    result = severity_arrays(raw, DISORDERS, thresholds)
+    result["normalized_scores"] = raw / result["max_scores"]
+    return result
+
+
+def severity_arrays(raw, disorders, thresholds=None):
+    """Vectorized ``calculate_severity`` over raw scores whose last axis follows ``disorders``."""
+    thresholds = thresholds or DISORDER_THRESHOLDS
+    max_scores = np.array([thresholds[d]["max_score"] for d in disorders])
+    cutoffs = np.array([thresholds[d]["threshold"] for d in disorders])
+    # Same operation order as calculate_severity so floats match bit for bit
+    percentage = (raw / max_scores) * 100
+    severity = np.where(percentage < 33, 0, np.where(percentage <= 66, 1, 2))
+    return {
+        "disorders": list(disorders),
+        "raw_scores": raw,
+        "max_scores": max_scores,
+        "thresholds": cutoffs,
+        "percentage": percentage,
+        "severity": SEVERITY_LABELS[severity],
+        "meets_threshold": raw >= cutoffs,
+    }
+
+
+def participant_result(batch, row, selected_assessments=None):
+    """Return ``(normalized_scores, severity_levels)`` for one row of a batch.
+
+    The output has the same shape as ``analyze_questionnaire`` so either can
+    feed the results page.
+    """
+    selected = DISORDERS if selected_assessments is None else selected_assessments
+    normalized_scores, severity_levels = {}, {}
+    for disorder in selected:
+        k = DISORDERS.index(disorder)
+        normalized_scores[disorder] = float(batch["normalized_scores"][row, k])
+        severity_levels[disorder] = level_at(batch, k, row)
+    return normalized_scores, severity_levels
+
+
+def level_at(arrays, k, row=None):
+    """``SeverityLevel`` for column ``k`` (and ``row``, for 2-D scores) of ``severity_arrays`` output."""
+    at = (k,) if row is None else (row, k)
+    return SeverityLevel(str(arrays["severity"][at]), int(arrays["raw_scores"][at]), int(arrays["max_scores"][k]), float(arrays["percentage"][at]), int(arrays["thresholds"][k]), bool(arrays["meets_threshold"][at]))
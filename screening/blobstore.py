@@ -0,0 +1,206 @@
+"""Content-addressed on-disk store for uploaded audio.
+
+Uploads are streamed to ``<root>/blobs/<aa>/<sha256>`` and sessions keep only
+a small handle dict. Each session pins the blobs it uses with an empty file
+under ``<root>/sessions/<session_id>/``. Releasing a session removes its pins
+and deletes, right away, every blob it pinned that no other session pins.
+Sessions that are never released are left to the sweep, which expires idle
+sessions and deletes unpinned blobs once they outlive the TTL, or sooner
+when the store is over its size cap.
+"""
+import contextlib
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+ROOT = os.environ.get("SCREENING_BLOB_DIR", os.path.join(tempfile.gettempdir(), "screening-blobs"))
+MAX_BLOB_BYTES = int(os.environ.get("SCREENING_MAX_BLOB_BYTES", 50 * 1024 * 1024))
+MAX_STORE_BYTES = int(os.environ.get("SCREENING_MAX_STORE_BYTES", 2 * 1024 * 1024 * 1024))
+TTL_SECONDS = int(os.environ.get("SCREENING_BLOB_TTL", 6 * 60 * 60))
+SWEEP_INTERVAL = 300
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStoreError(Exception):
+    pass
+
+
+class BlobTooLarge(BlobStoreError):
+    pass
+
+
+class BlobStoreFull(BlobStoreError):
+    pass
+
+
+class BlobStore:
+    def __init__(self, root=ROOT, max_blob_bytes=MAX_BLOB_BYTES, max_store_bytes=MAX_STORE_BYTES, ttl=TTL_SECONDS):
+        self.root = root
+        self.max_blob_bytes = max_blob_bytes
+        self.max_store_bytes = max_store_bytes
+        self.ttl = ttl
+        self._blobs = os.path.join(root, "blobs")
+        self._sessions = os.path.join(root, "sessions")
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        os.makedirs(self._blobs, exist_ok=True)
+        os.makedirs(self._sessions, exist_ok=True)
+
+    def _blob_path(self, digest):
+        return os.path.join(self._blobs, digest[:2], digest)
+
+    def _session_dir(self, session_id):
+        return os.path.join(self._sessions, session_id)
+
+    def path(self, handle):
+        return self._blob_path(handle["sha256"])
+
+    def put(self, source, session_id, name=None):
+        """Stream ``source`` (bytes or a readable file) into the store.
+
+        Returns a handle dict. Raises ``BlobTooLarge`` as soon as the stream
+        passes ``max_blob_bytes`` and ``BlobStoreFull`` if eviction cannot
+        make room.
+        """
+        self.maybe_sweep()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            chunks = (bytes(source[i:i + CHUNK_SIZE]) for i in range(0, len(source), CHUNK_SIZE))
+        else:
+            if hasattr(source, "seek"):
+                source.seek(0)
+            chunks = iter(lambda: source.read(CHUNK_SIZE), b"")
+        digest, size = hashlib.sha256(), 0
+        fd, tmp = tempfile.mkstemp(dir=self._blobs, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_blob_bytes:
+                        raise BlobTooLarge(f"upload exceeds {self.max_blob_bytes // (1024 * 1024)} MB")
+                    digest.update(chunk)
+                    out.write(chunk)
+            digest = digest.hexdigest()
+            target = self._blob_path(digest)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with self._lock:
+                if os.path.exists(target):
+                    os.utime(target)
+                else:
+                    self._make_room(size)
+                    os.replace(tmp, target)
+                # Pin before releasing the lock so a concurrent sweep cannot evict the blob first
+                self.pin(session_id, digest)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return {"sha256": digest, "size": size, "name": name}
+
+    def pin(self, session_id, digest):
+        session_dir = self._session_dir(session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        open(os.path.join(session_dir, digest), "a").close()
+        os.utime(session_dir)
+
+    def touch_session(self, session_id):
+        """Mark a session as active so the sweep does not expire it."""
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(self._session_dir(session_id))
+
+    @contextlib.contextmanager
+    def open(self, handle):
+        """Memory-map a blob read-only; yields a file-like ``mmap`` object."""
+        with open(self.path(handle), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield f
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    def release_session(self, session_id):
+        """Unpin a session's blobs and delete those no other session pins.
+
+        Only this session's blobs are looked at; the store-wide sweep is
+        left to ``maybe_sweep``.
+        """
+        session_dir = self._session_dir(session_id)
+        with self._lock:
+            try:
+                digests = os.listdir(session_dir)
+            except FileNotFoundError:
+                return
+            shutil.rmtree(session_dir, ignore_errors=True)
+            others = [self._session_dir(s) for s in os.listdir(self._sessions)]
+            for digest in digests:
+                if not any(os.path.exists(os.path.join(other, digest)) for other in others):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(self._blob_path(digest))
+
+    def _pinned(self):
+        pinned = set()
+        for session_id in os.listdir(self._sessions):
+            with contextlib.suppress(FileNotFoundError, NotADirectoryError):
+                pinned.update(os.listdir(self._session_dir(session_id)))
+        return pinned
+
+    def _blob_stats(self):
+        for shard in os.listdir(self._blobs):
+            shard_dir = os.path.join(self._blobs, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for digest in os.listdir(shard_dir):
+                with contextlib.suppress(FileNotFoundError):
+                    st = os.stat(os.path.join(shard_dir, digest))
+                    yield digest, st.st_size, st.st_mtime
+
+    def _make_room(self, incoming):
+        # Caller holds the lock. Evict unpinned blobs, oldest first.
+        blobs = sorted(self._blob_stats(), key=lambda b: b[2])
+        total = sum(size for _, size, _ in blobs) + incoming
+        if total <= self.max_store_bytes:
+            return
+        pinned = self._pinned()
+        for digest, size, _ in blobs:
+            if total <= self.max_store_bytes:
+                return
+            if digest not in pinned:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self._blob_path(digest))
+                total -= size
+        if total > self.max_store_bytes:
+            raise BlobStoreFull("audio store is full, please try again later")
+
+    def sweep(self, now=None):
+        """Expire idle sessions and delete unpinned blobs older than the TTL."""
+        now = now or time.time()
+        with self._lock:
+            self._last_sweep = now
+            for session_id in os.listdir(self._sessions):
+                session_dir = self._session_dir(session_id)
+                with contextlib.suppress(FileNotFoundError):
+                    if now - os.stat(session_dir).st_mtime > self.ttl:
+                        shutil.rmtree(session_dir, ignore_errors=True)
+            pinned = self._pinned()
+            for digest, _, mtime in list(self._blob_stats()):
+                if digest not in pinned and now - mtime > self.ttl:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(self._blob_path(digest))
+
+    def maybe_sweep(self):
+        if time.time() - self._last_sweep > SWEEP_INTERVAL:
+            self.sweep()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
@@ -0,0 +1,187 @@
+"""SQLite persistence for sessions, responses and scores.
+
+Persistence is opt-in: set ``SCREENING_DB_PATH`` to enable it. Writes are
+queued and applied by a background thread in batched transactions, so
+``record_session`` never touches the database on the caller's thread. The
+database runs in WAL mode so cohort queries can read while the writer
+commits.
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from .instruments import MISSING, REGISTRY
+
+DB_PATH = os.environ.get("SCREENING_DB_PATH")
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.5
+QUEUE_LIMIT = 10000
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    assessment_date TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    age INTEGER,
+    gender TEXT,
+    mode TEXT
+);
+CREATE TABLE IF NOT EXISTS responses (
+    session_id TEXT NOT NULL,
+    modality TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    value,
+    PRIMARY KEY (session_id, modality, item_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS scores (
+    session_id TEXT NOT NULL,
+    modality TEXT NOT NULL,
+    disorder TEXT NOT NULL,
+    assessment_date TEXT NOT NULL,
+    score REAL,
+    confidence REAL,
+    severity TEXT,
+    raw_score INTEGER,
+    max_score INTEGER,
+    meets_threshold INTEGER,
+    PRIMARY KEY (session_id, modality, disorder)
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (assessment_date);
+CREATE INDEX IF NOT EXISTS idx_scores_date ON scores (assessment_date);
+CREATE INDEX IF NOT EXISTS idx_scores_disorder_severity ON scores (disorder, severity, assessment_date);
+"""
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or DB_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def session_rows(session_id, age, gender, results, modality_results, inputs, assessment_date=None):
+    """Flatten one assessment into ``(sessions, responses, scores)`` row lists.
+
+    ``results`` is the fused results dict, ``modality_results`` the per-modality
+    cache from ``fusion`` and ``inputs`` maps modality to its responses: the
+    questionnaire bytearray or an ``{item_id: value}`` dict. Questionnaire
+    ratings are stored as integers and fused scores under the modality name
+    ``fused``.
+    """
+    date = assessment_date or time.strftime('%Y-%m-%d')
+    sessions = [(session_id, date, time.time(), age, gender, results.get('mode'))]
+    responses = []
+    for modality, values in inputs.items():
+        if isinstance(values, (bytes, bytearray)):
+            responses.extend((session_id, modality, item_id, rating) for item_id, rating in zip(REGISTRY.item_ids, values) if rating != MISSING)
+            continue
+        for item_id, value in values.items():
+            if isinstance(value, dict):
+                value = value.get('sha256')
+            responses.append((session_id, modality, item_id, value))
+    scores = []
+    confidence = results.get('confidence', {})
+    sources = {m: (entry['scores'], entry['severity_levels'], {}) for m, entry in modality_results.items()}
+    sources['fused'] = (results['scores'], results['severity_levels'], confidence)
+    for modality, (modality_scores, severity_levels, conf) in sources.items():
+        for disorder, score in modality_scores.items():
+            level = severity_levels.get(disorder)
+            if level is None:
+                scores.append((session_id, modality, disorder, date, score, conf.get(disorder), None, None, None, None))
+            else:
+                scores.append((session_id, modality, disorder, date, score, conf.get(disorder), level.severity, level.raw_score, level.max_score, level.meets_threshold))
+    return sessions, responses, scores
+
+
+def write_rows(conn, sessions, responses, scores):
+    session_ids = [(row[0],) for row in sessions]
+    with conn:
+        # Resubmitting a session replaces everything recorded for it
+        conn.executemany("DELETE FROM responses WHERE session_id = ?", session_ids)
+        conn.executemany("DELETE FROM scores WHERE session_id = ?", session_ids)
+        conn.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)", sessions)
+        conn.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", responses)
+        conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", scores)
+
+
+class Writer:
+    """Background thread that drains queued sessions into SQLite in batches."""
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue(maxsize=QUEUE_LIMIT)
+        self._thread = threading.Thread(target=self._run, name="screening-db-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, rows):
+        try:
+            self.queue.put_nowait(rows)
+        except queue.Full:
+            log.warning("database write queue is full; dropping session %s", rows[0][0][0])
+
+    def _run(self):
+        conn = connect(self.path)
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            rows = [r for r in batch if r is not None]
+            if rows:
+                try:
+                    write_rows(conn, *([row for r in rows for row in r[i]] for i in range(3)))
+                except sqlite3.Error:
+                    log.exception("failed to write %d sessions", len(rows))
+            if stop:
+                conn.close()
+                return
+
+    def close(self, timeout=5):
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def enabled():
+    return bool(DB_PATH)
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None and enabled():
+            _writer = Writer(DB_PATH)
+        return _writer
+
+
+def record_session(*args, **kwargs):
+    """Queue one assessment for persistence; a no-op when persistence is off."""
+    writer = get_writer()
+    if writer is not None:
+        writer.submit(session_rows(*args, **kwargs))
+
+
+def cohort(conn, disorder=None, severity=None, since=None, until=None, modality='fused'):
+    """Fused (by default) score rows filtered on the indexed columns."""
+    clauses, params = ["modality = ?"], [modality]
+    for column, op, value in (("disorder", "=", disorder), ("severity", "=", severity), ("assessment_date", ">=", since), ("assessment_date", "<=", until)):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+    return conn.execute("SELECT * FROM scores WHERE " + " AND ".join(clauses), params)
@@ -0,0 +1,151 @@
+"""Streaming bulk export of stored assessments to CSV or Parquet.
+
+    python -m screening.export --start 2026-01-01 --end 2026-06-30 --format parquet --out cohort.parquet
+
+Sessions in the date range are read from the database in chunks of
+``chunk_size`` and each chunk is written out before the next is fetched,
+so memory stays flat however many sessions match. There is one row per
+session and disorder, with the columns of the single-session CSV report
+followed by severity, demographics and the questionnaire item ratings.
+"""
+import argparse
+import csv
+import os
+import sys
+
+from . import db
+from .instruments import REGISTRY
+
+CHUNK_SIZE = 500
+REPORT_COLUMNS = ["Disorder", "Risk_Score", "Confidence", "Assessment_Date"]
+DETAIL_COLUMNS = ["Severity", "Raw_Score", "Max_Score", "Meets_Threshold", "Session_ID", "Age", "Gender", "Mode"]
+ITEM_COLUMNS = [f"Q{item_id:02d}" for item_id in REGISTRY.item_ids]
+COLUMNS = REPORT_COLUMNS + DETAIL_COLUMNS + ITEM_COLUMNS
+ITEM_COLUMN = dict(zip(REGISTRY.item_ids, ITEM_COLUMNS))
+FORMATS = ("csv", "parquet")
+
+
+def _placeholders(n):
+    return ",".join("?" * n)
+
+
+def _date_filter(start, end):
+    where, params = [], []
+    if start:
+        where.append("assessment_date >= ?")
+        params.append(str(start))
+    if end:
+        where.append("assessment_date <= ?")
+        params.append(str(end))
+    return (" WHERE " + " AND ".join(where) if where else ""), params
+
+
+def iter_chunks(conn, start=None, end=None, chunk_size=CHUNK_SIZE):
+    """Yield ``(rows, sessions_in_chunk)`` for sessions dated within ``[start, end]``."""
+    clause, params = _date_filter(start, end)
+    cursor = conn.execute(f"SELECT session_id, age, gender, mode FROM sessions{clause} ORDER BY assessment_date, session_id", params)
+    while True:
+        sessions = cursor.fetchmany(chunk_size)
+        if not sessions:
+            return
+        ids = [s[0] for s in sessions]
+        items = {sid: {} for sid in ids}
+        for sid, item_id, rating in conn.execute(f"SELECT session_id, item_id, value FROM responses WHERE modality = 'questionnaire' AND session_id IN ({_placeholders(len(ids))})", ids):
+            if item_id in ITEM_COLUMN:
+                items[sid][ITEM_COLUMN[item_id]] = rating
+        demographics = {s[0]: s[1:] for s in sessions}
+        rows = []
+        for sid, disorder, score, confidence, date, severity, raw, max_score, meets in conn.execute(
+                f"SELECT session_id, disorder, score, confidence, assessment_date, severity, raw_score, max_score, meets_threshold "
+                f"FROM scores WHERE modality = 'fused' AND session_id IN ({_placeholders(len(ids))}) ORDER BY assessment_date, session_id", ids):
+            age, gender, mode = demographics[sid]
+            row = [disorder, score, confidence, date, severity, raw, max_score, None if meets is None else bool(meets), sid, age, gender, mode]
+            row += [items[sid].get(c) for c in ITEM_COLUMNS]
+            rows.append(row)
+        yield rows, len(sessions)
+
+
+class CsvSink:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from None
+        self._pa = pa
+        types = [pa.string(), pa.float64(), pa.float64(), pa.string(), pa.string(), pa.int32(), pa.int32(), pa.bool_(), pa.string(), pa.int32(), pa.string(), pa.string()] + [pa.uint8()] * len(ITEM_COLUMNS)
+        self._schema = pa.schema(list(zip(COLUMNS, types)))
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        if rows:
+            columns = list(zip(*rows))
+            self._writer.write_batch(self._pa.record_batch([self._pa.array(col, type=f.type) for col, f in zip(columns, self._schema)], schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def export(path, fmt="csv", start=None, end=None, conn=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Stream matching sessions to ``path``; returns the number of rows written.
+
+    ``progress(done, total)`` is called after every chunk with session counts.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    owned = conn is None
+    conn = conn or db.connect()
+    try:
+        clause, params = _date_filter(start, end)
+        total = conn.execute(f"SELECT COUNT(*) FROM sessions{clause}", params).fetchone()[0]
+        sink = CsvSink(path) if fmt == "csv" else ParquetSink(path)
+        done = written = 0
+        try:
+            for rows, n_sessions in iter_chunks(conn, start, end, chunk_size):
+                sink.write(rows)
+                done += n_sessions
+                written += len(rows)
+                if progress:
+                    progress(done, total)
+        finally:
+            sink.close()
+    finally:
+        if owned:
+            conn.close()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored assessments to CSV or Parquet.")
+    parser.add_argument("--db", default=db.DB_PATH, help="SQLite database (default: $SCREENING_DB_PATH)")
+    parser.add_argument("--start", help="first assessment date, YYYY-MM-DD")
+    parser.add_argument("--end", help="last assessment date, YYYY-MM-DD")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    if not args.db or not os.path.exists(args.db):
+        parser.error("no database found; pass --db or set SCREENING_DB_PATH")
+
+    def report(done, total):
+        print(f"\r{done}/{total} sessions", end="", file=sys.stderr, flush=True)
+
+    rows = export(args.out, args.format, args.start, args.end, db.connect(args.db), args.chunk_size, report)
+    print(f"\nwrote {rows} rows to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
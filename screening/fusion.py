@@ -0,0 +1,80 @@
+"""Per-modality result cache and weighted multimodal fusion.
+
+Each modality's analyzer output is cached under a digest of its inputs and
+the selected assessments, so adding or changing one modality only re-runs
+that modality's analyzer. ``fuse`` stacks the cached scores into a
+modalities x disorders matrix and combines them in one vectorized pass.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+from .batch import DISORDERS, level_at, severity_arrays
+from .instruments import DISORDER_THRESHOLDS
+
+MODALITY_WEIGHTS = {'questionnaire': 0.5, 'text': 0.25, 'audio': 0.25}
+
+
+def _jsonable(value):
+    return value.hex() if isinstance(value, (bytes, bytearray)) else str(value)
+
+
+def input_key(inputs, selected_assessments):
+    payload = json.dumps([list(selected_assessments), inputs], sort_keys=True, default=_jsonable)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def update_modality(cache, modality, analyzer, inputs, selected_assessments):
+    """Run ``analyzer`` only if this modality's inputs changed since the last call.
+
+    An analyzer that raises leaves the cache untouched, so an incomplete
+    result is never stored and the next call runs it again.
+    """
+    key = input_key(inputs, selected_assessments)
+    entry = cache.get(modality)
+    if entry is None or entry['key'] != key:
+        scores, severity_levels = analyzer(inputs, selected_assessments)
+        entry = cache[modality] = {'key': key, 'scores': scores, 'severity_levels': severity_levels}
+    return entry
+
+
+def fuse(cache, weights=MODALITY_WEIGHTS):
+    """Combine cached modality scores into one results dict.
+
+    The combined score is the weighted mean over the modalities that scored a
+    disorder. Confidence is the share of total modality weight that covered
+    the disorder, discounted by how much the modalities disagree.
+    """
+    modalities = [m for m in weights if m in cache]
+    disorders = [d for d in DISORDERS if any(d in cache[m]['scores'] for m in modalities)]
+    scores = np.full((len(modalities), len(disorders)), np.nan)
+    for i, m in enumerate(modalities):
+        for j, d in enumerate(disorders):
+            scores[i, j] = cache[m]['scores'].get(d, np.nan)
+    present = ~np.isnan(scores)
+    w = np.array([weights[m] for m in modalities])[:, None] * present
+    coverage = w.sum(axis=0)
+    combined = (np.where(present, scores, 0.0) * w).sum(axis=0) / coverage
+    spread = np.sqrt((w * (np.where(present, scores, combined) - combined) ** 2).sum(axis=0) / coverage)
+    confidence = np.clip(coverage / sum(weights.values()) * (1 - spread), 0.0, 1.0)
+
+    # A disorder seen by one modality keeps that modality's severity entry as is;
+    # fused disorders get severity from the combined score on the instrument's scale.
+    max_scores = np.array([DISORDER_THRESHOLDS[d]['max_score'] for d in disorders])
+    raw = np.rint(combined * max_scores).astype(int)
+    fused = severity_arrays(raw, disorders)
+    severity_levels = {}
+    for j, d in enumerate(disorders):
+        sources = [m for i, m in enumerate(modalities) if present[i, j]]
+        if len(sources) == 1:
+            severity_levels[d] = cache[sources[0]]['severity_levels'][d]
+        else:
+            severity_levels[d] = level_at(fused, j)
+    return {
+        'scores': {d: float(combined[j]) for j, d in enumerate(disorders)},
+        'severity_levels': severity_levels,
+        'confidence': {d: float(confidence[j]) for j, d in enumerate(disorders)},
+        'mode': f'{modalities[0]}_only' if len(modalities) == 1 else 'multimodal',
+        'modalities': modalities,
+    }
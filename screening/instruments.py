@@ -0,0 +1,110 @@
+"""Compiled instrument registry.
+
+Instruments are loaded once per process from a versioned JSON definition
+(``instruments.json``, or ``$SCREENING_INSTRUMENTS``). Every item has a
+stable integer id. A session's questionnaire answers are a ``bytearray``
+with one rating per item in registry order and ``MISSING`` for unanswered
+items, so an instrument's items are one contiguous slice.
+
+Each instrument also carries the ``text_markers`` and ``audio_markers``
+weights the free-text and voice analyzers score it with. Both are required,
+so an instrument added to the definition cannot silently score 0 on those
+paths; ``screening.text`` and ``screening.audio`` reject unknown marker names
+when they are imported.
+"""
+import functools
+import json
+import os
+
+SCHEMA_VERSION = 2
+DEFINITION_PATH = os.environ.get("SCREENING_INSTRUMENTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instruments.json"))
+MISSING = 255
+
+
+class Instrument:
+    __slots__ = ("id", "label", "icon", "threshold", "item_ids", "questions", "start", "stop", "max_score", "text_markers", "audio_markers")
+
+    def __init__(self, spec, start, scale_max):
+        self.id = spec["id"]
+        for field in ("text_markers", "audio_markers"):
+            if not isinstance(spec.get(field), dict) or not spec[field]:
+                raise ValueError(f"instrument {self.id!r} needs a non-empty {field!r} mapping of marker weights")
+        self.text_markers = dict(spec["text_markers"])
+        self.audio_markers = dict(spec["audio_markers"])
+        self.label = spec["label"]
+        self.icon = spec.get("icon", "")
+        self.threshold = spec["threshold"]
+        self.item_ids = tuple(item["id"] for item in spec["items"])
+        self.questions = tuple(item["text"] for item in spec["items"])
+        self.start = start
+        self.stop = start + len(self.item_ids)
+        self.max_score = len(self.item_ids) * scale_max
+
+
+class Registry:
+    __slots__ = ("version", "scale", "options", "instruments", "item_ids", "questions", "position", "by_text")
+
+    def __init__(self, definition):
+        if definition.get("version") != SCHEMA_VERSION:
+            raise ValueError(f"unsupported instrument definition version {definition.get('version')!r}")
+        self.version = definition["version"]
+        self.scale = tuple(definition["scale"])
+        self.options = tuple(f"{i} - {label}" for i, label in enumerate(self.scale))
+        self.instruments = {}
+        start = 0
+        for spec in definition["instruments"]:
+            instrument = Instrument(spec, start, len(self.scale) - 1)
+            self.instruments[instrument.id] = instrument
+            start = instrument.stop
+        self.item_ids = tuple(i for inst in self.instruments.values() for i in inst.item_ids)
+        self.questions = tuple(q for inst in self.instruments.values() for q in inst.questions)
+        if len(set(self.item_ids)) != len(self.item_ids):
+            raise ValueError("instrument item ids must be unique")
+        self.position = {item_id: pos for pos, item_id in enumerate(self.item_ids)}
+        self.by_text = dict(zip(self.questions, self.item_ids))
+
+    def __getitem__(self, instrument_id):
+        return self.instruments[instrument_id]
+
+    def __iter__(self):
+        return iter(self.instruments.values())
+
+    def new_responses(self):
+        return bytearray([MISSING]) * len(self.item_ids)
+
+    def resolve(self, key):
+        """Item id for an int id, a numeric string id or a question's text; None if unknown."""
+        if isinstance(key, str):
+            key = int(key) if key.isdigit() else self.by_text.get(key)
+        return key if key in self.position else None
+
+    def encode(self, ratings):
+        """``{item: 0-4 rating}`` to a response bytearray; items may be ids or question text."""
+        responses = self.new_responses()
+        for key, rating in ratings.items():
+            item_id = self.resolve(key)
+            if item_id is not None and rating is not None:
+                responses[self.position[item_id]] = rating
+        return responses
+
+    def encode_labels(self, labels):
+        """Like ``encode`` for option labels such as "3 - Often" (the pre-registry format)."""
+        return self.encode({k: int(v[0]) for k, v in labels.items() if v and v[0].isdigit()})
+
+    def raw_score(self, responses, instrument_id):
+        instrument = self.instruments[instrument_id]
+        return sum(r for r in responses[instrument.start:instrument.stop] if r != MISSING)
+
+
+@functools.lru_cache(maxsize=None)
+def load(path=DEFINITION_PATH):
+    with open(path, encoding="utf-8") as f:
+        return Registry(json.load(f))
+
+
+REGISTRY = load()
+
+# Mapping views kept for callers that predate the registry
+QUESTIONNAIRE_ITEMS = {inst.id: list(inst.questions) for inst in REGISTRY}
+DISORDER_THRESHOLDS = {inst.id: {'questions': len(inst.item_ids), 'max_score': inst.max_score, 'threshold': inst.threshold} for inst in REGISTRY}
+RESPONSE_OPTIONS = list(REGISTRY.options)
@@ -0,0 +1,305 @@
+"""In-process metrics for the app and the service.
+
+Counters and histograms live in one process-wide registry and are exported
+as Prometheus text (``prometheus_text``) or JSON (``snapshot``). Streamlit
+cannot mount extra routes, so the app serves them from a small background
+HTTP server when ``SCREENING_METRICS_PORT`` is set::
+
+    GET :$SCREENING_METRICS_PORT/metrics        Prometheus text format
+    GET :$SCREENING_METRICS_PORT/metrics.json   the same numbers as JSON
+
+The scoring service exposes the same registry on its own ``/metrics`` route.
+
+Each full Streamlit rerun is bracketed by ``begin_rerun`` / ``end_rerun``
+and counted with ``kind="full"``. A rerun cut short by ``st.rerun()`` is
+counted but not timed, since the rest of the script never ran. Fragment
+bodies are wrapped with ``fragment``. When one reruns on its own, without
+the rest of the script, it is counted and timed with ``kind="fragment"``.
+Session state size is sampled every ``STATE_SAMPLE_EVERY`` full reruns
+per process. Setting ``SCREENING_PROFILE_DIR`` allows profiling one
+session by opening the app with ``?profile=cprofile`` (or ``pyinstrument``).
+Each completed rerun then writes a profile into that directory, and an
+interrupted rerun's profile carries on into the one that follows it.
+"""
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+
+METRICS_PORT = int(os.environ.get("SCREENING_METRICS_PORT", 0))
+PROFILE_DIR = os.environ.get("SCREENING_PROFILE_DIR")
+PROFILERS = ("cprofile", "pyinstrument")
+STATE_SAMPLE_EVERY = int(os.environ.get("SCREENING_STATE_SAMPLE_EVERY", 20))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_metrics = {}
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, key, value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            series = self.values.get(key)
+            if series is None:
+                # One count per bucket plus +Inf, then the sum
+                series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self):
+        for key, series in self.values.items():
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                total += count
+                yield self.name + "_bucket", key + (("le", str(bound)),), total
+            yield self.name + "_sum", key, series[-1]
+            yield self.name + "_count", key, total
+
+
+def _register(metric):
+    return _metrics.setdefault(metric.name, metric)
+
+
+RERUNS = _register(Counter("screening_reruns_total", "Streamlit script runs started, by page and kind (full or fragment)"))
+PAGE_SECONDS = _register(Histogram("screening_page_render_seconds", "Wall time of completed Streamlit reruns, by page and kind (full or fragment)"))
+FRAGMENT_SECONDS = _register(Histogram("screening_fragment_seconds", "Fragment body time, by fragment, inside full reruns or on their own"))
+ANALYZER_SECONDS = _register(Histogram("screening_analyzer_seconds", "Analyzer call time, by modality"))
+FIGURE_SECONDS = _register(Histogram("screening_figure_seconds", "Results chart build time (memoized calls included)"))
+STATE_BYTES = _register(Histogram("screening_session_state_bytes", "Pickled size of st.session_state at the end of a sampled rerun, uploads excluded", SIZE_BUCKETS))
+REQUEST_SECONDS = _register(Histogram("screening_request_seconds", "Service request handling time, by route and status"))
+
+
+@contextlib.contextmanager
+def timer(histogram, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - t0, **labels)
+
+
+def timed(func, histogram, **labels):
+    """``func`` wrapped so every call is observed in ``histogram``."""
+    def wrapper(*args, **kwargs):
+        with timer(histogram, **labels):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _is_upload(value):
+    if isinstance(value, (list, tuple)):
+        return any(_is_upload(v) for v in value)
+    return hasattr(value, "read") and hasattr(value, "seek")
+
+
+def state_size(state):
+    """Approximate bytes held by a session state mapping.
+
+    File-like values (``st.file_uploader`` results hold whole recordings)
+    are skipped rather than pickled; the app keeps only blob store handles
+    for those. Other values that cannot be pickled are counted with
+    ``sys.getsizeof``.
+    """
+    total = 0
+    for key in list(state.keys()):
+        value = state[key]
+        if _is_upload(value):
+            continue
+        try:
+            total += len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            total += sys.getsizeof(value)
+    return total
+
+
+def _label_text(key):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}" if key else ""
+
+
+def prometheus_text():
+    lines = []
+    with _lock:
+        for metric in _metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{_label_text(key)} {value}" for name, key, value in metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    with _lock:
+        return {metric.name: [{"sample": name, "labels": dict(key), "value": value} for name, key, value in metric.samples()] for metric in _metrics.values()}
+
+
+_server = None
+_serve_attempted = False
+
+
+def serve(port=METRICS_PORT, host="127.0.0.1"):
+    """Start the metrics HTTP server once per process; a no-op without a port.
+
+    Only the first call tries to bind. If the port is taken (another replica
+    on the same host), that is logged once and the app runs without it.
+    """
+    global _server, _serve_attempted
+    with _lock:
+        if _serve_attempted or not port:
+            return _server
+        _serve_attempted = True
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, ctype = prometheus_text().encode(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, ctype = json.dumps(snapshot()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            log.warning("metrics server not started on %s:%s: %s", host, port, e)
+            return None
+        threading.Thread(target=_server.serve_forever, name="screening-metrics", daemon=True).start()
+        return _server
+
+
+class _Profiler:
+    def __init__(self, kind):
+        self.kind = kind
+        if kind == "pyinstrument":
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+        else:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def dump(self, path):
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+            with open(path + ".html", "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            self._profiler.dump_stats(path + ".prof")
+
+
+# Profilers still running because their rerun was interrupted, by session id
+_profiling = {}
+# The full rerun running on this thread; Streamlit runs fragment-only reruns without one
+_local = threading.local()
+_completed = 0
+
+
+class Rerun:
+    __slots__ = ("page", "session_id", "started", "profiler")
+
+
+def begin_rerun(page, session_id, profile=None):
+    """Count a full rerun of ``page`` and start timing (and profiling, if requested) it."""
+    RERUNS.inc(page=page, kind="full")
+    rerun = Rerun()
+    rerun.page, rerun.session_id, rerun.started = page, session_id, time.perf_counter()
+    rerun.profiler = _profiling.pop(session_id, None)
+    if rerun.profiler is None and profile in PROFILERS and PROFILE_DIR:
+        try:
+            rerun.profiler = _Profiler(profile)
+        except (ImportError, ValueError):
+            # pyinstrument not installed, or another profiler already owns the interpreter
+            rerun.profiler = None
+    if rerun.profiler is not None:
+        _profiling[session_id] = rerun.profiler
+    _local.rerun = rerun
+    return rerun
+
+
+def end_rerun(rerun, state=None):
+    """Record a completed rerun's latency (and, sampled, session state size); write its profile."""
+    global _completed
+    _local.rerun = None
+    PAGE_SECONDS.observe(time.perf_counter() - rerun.started, page=rerun.page, kind="full")
+    with _lock:
+        _completed += 1
+        sample = _completed % STATE_SAMPLE_EVERY == 0
+    if state is not None and sample:
+        STATE_BYTES.observe(state_size(state), page=rerun.page)
+    profiler = _profiling.pop(rerun.session_id, None)
+    if profiler is not None:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump(os.path.join(PROFILE_DIR, f"{rerun.session_id}-{rerun.page}-{time.time_ns()}"))
+
+
+def fragment(name, page):
+    """Decorator for ``st.fragment`` bodies (apply it under ``@st.fragment``).
+
+    Every call is timed under ``FRAGMENT_SECONDS``. A call outside a full
+    rerun is a fragment-only rerun: it is also counted in ``RERUNS`` and
+    timed in ``PAGE_SECONDS`` with ``kind="fragment"``, for the page that
+    ``page()`` returns.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            alone = getattr(_local, "rerun", None) is None
+            if alone:
+                label = page()
+                RERUNS.inc(page=label, kind="fragment")
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                FRAGMENT_SECONDS.observe(elapsed, fragment=name)
+                if alone:
+                    PAGE_SECONDS.observe(elapsed, page=label, kind="fragment")
+        return wrapper
+    return decorate
@@ -0,0 +1,136 @@
+"""Age- and gender-stratified percentile norms.
+
+    python -m screening.norms --db screening.db --out norms.json [--min-count 30] [--modality questionnaire]
+
+Norms are built offline from one modality's raw scores in the SQLite store
+and written as JSON. The default is the questionnaire: fused scores mix
+sessions taken in different modes, so they are not one comparable cohort.
+The file records its modality, and a session is only compared against it
+using its own raw score from that modality. Building reads the scores with one streaming query and
+keeps only a histogram per disorder, age band and gender. For every raw
+score 0..max_score the file stores a mid-rank percentile: the share of the
+stratum scoring lower, plus half of those scoring the same.
+
+At runtime ``get_index`` loads ``$SCREENING_NORMS_PATH`` once per process.
+Lookups are dict and tuple indexing, with no scan of the cohort. A stratum
+with fewer than ``min_count`` sessions is left out of the file. Lookups
+then fall back to the age band across genders, then to everyone.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+
+from . import db
+from .instruments import REGISTRY
+
+NORMS_PATH = os.environ.get("SCREENING_NORMS_PATH")
+NORMS_VERSION = 1
+MIN_COUNT = 30
+ANY = "*"
+AGE_BANDS = ((5, 12), (13, 17), (18, 25), (26, 40), (41, 60), (61, 100))
+# Age in whole years straight to its band label, so a lookup never searches the bands
+_BAND_OF_AGE = {age: f"{lo}-{hi}" for lo, hi in AGE_BANDS for age in range(lo, hi + 1)}
+
+
+def age_band(age):
+    return _BAND_OF_AGE.get(age) if isinstance(age, int) else None
+
+
+def stratum_key(disorder, band, gender):
+    return f"{disorder}|{band}|{gender}"
+
+
+def _percentiles(counts):
+    n, below, out = sum(counts), 0, []
+    for count in counts:
+        out.append(round(100 * (below + count / 2) / n, 2))
+        below += count
+    return out
+
+
+def build(conn, min_count=MIN_COUNT, modality="questionnaire"):
+    """Norms dict from every stored session with an age, for ``modality`` scores."""
+    histograms = {}
+    rows = conn.execute(
+        "SELECT sc.disorder, sc.raw_score, s.age, s.gender FROM scores sc JOIN sessions s ON s.session_id = sc.session_id "
+        "WHERE sc.modality = ? AND sc.raw_score IS NOT NULL AND s.age IS NOT NULL", (modality,))
+    for disorder, raw_score, age, gender in rows:
+        band = age_band(age)
+        if disorder not in REGISTRY.instruments or band is None or not 0 <= raw_score <= REGISTRY[disorder].max_score:
+            continue
+        keys = [stratum_key(disorder, band, ANY), stratum_key(disorder, ANY, ANY)]
+        if gender:
+            keys.append(stratum_key(disorder, band, gender))
+        for key in keys:
+            counts = histograms.get(key)
+            if counts is None:
+                counts = histograms[key] = [0] * (REGISTRY[disorder].max_score + 1)
+            counts[raw_score] += 1
+    return {
+        "version": NORMS_VERSION,
+        "built": time.strftime("%Y-%m-%d"),
+        "modality": modality,
+        "min_count": min_count,
+        "age_bands": [f"{lo}-{hi}" for lo, hi in AGE_BANDS],
+        "strata": {key: {"n": sum(counts), "percentiles": _percentiles(counts)} for key, counts in sorted(histograms.items()) if sum(counts) >= min_count},
+    }
+
+
+class NormIndex:
+    """In-memory norms: ``lookup`` is a few dict probes and a tuple index."""
+
+    def __init__(self, norms):
+        if norms.get("version") != NORMS_VERSION:
+            raise ValueError(f"unsupported norms version {norms.get('version')!r}")
+        self.built = norms.get("built")
+        # Files written before the modality was recorded were built from fused scores
+        self.modality = norms.get("modality", "fused")
+        self._strata = {key: (s["n"], tuple(s["percentiles"])) for key, s in norms["strata"].items()}
+
+    def lookup(self, disorder, raw_score, age=None, gender=None):
+        """``(percentile, band, gender, n)`` from the narrowest stratum with norms, or None."""
+        band = age_band(age)
+        for b, g in ((band, gender), (band, ANY), (ANY, ANY)):
+            if b is None or g is None:
+                continue
+            stratum = self._strata.get(stratum_key(disorder, b, g))
+            if stratum is not None and 0 <= raw_score < len(stratum[1]):
+                return stratum[1][raw_score], b, g, stratum[0]
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return NormIndex(json.load(f))
+
+
+def get_index():
+    """The norms for this process, or None when ``SCREENING_NORMS_PATH`` is unset or missing."""
+    if not NORMS_PATH or not os.path.exists(NORMS_PATH):
+        return None
+    return load(NORMS_PATH)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build percentile norms from stored assessments.")
+    parser.add_argument("--db", default=db.DB_PATH, help="SQLite database (default: $SCREENING_DB_PATH)")
+    parser.add_argument("--out", default=NORMS_PATH, help="norms JSON (default: $SCREENING_NORMS_PATH)")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT, help="smallest stratum kept")
+    parser.add_argument("--modality", default="questionnaire", help="score modality to norm (default: questionnaire)")
+    args = parser.parse_args(argv)
+    if not args.db or not os.path.exists(args.db):
+        parser.error("no database found; pass --db or set SCREENING_DB_PATH")
+    if not args.out:
+        parser.error("pass --out or set SCREENING_NORMS_PATH")
+    norms = build(db.connect(args.db), args.min_count, args.modality)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(norms, f)
+    print(f"wrote {len(norms['strata'])} strata to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Streaming preprocessing for voice answers.
+
+Clips are read in fixed-size blocks, downmixed, resampled with a stateful
+soxr stream, framed, passed through an energy VAD with leading/trailing
+silence trimmed, and folded into running feature accumulators. Peak memory
+depends on ``BLOCK_FRAMES``, not on the length of the recording.
+"""
+import io
+import math
+import os
+
+TARGET_SR = 16000
+BLOCK_FRAMES = 64 * 1024
+FRAME_LENGTH = 1024
+HOP_LENGTH = 256
+SILENCE_DB = -45.0
+NOISE_MARGIN_DB = 12.0
+ONSET_DB = 6.0
+ONSET_GAP = 6  # frames, ~100 ms at 16 kHz
+FMIN, FMAX = 65.0, 400.0
+
+MAX_UPLOAD_BYTES = int(os.environ.get("SCREENING_MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+MAX_UPLOAD_SECONDS = float(os.environ.get("SCREENING_MAX_UPLOAD_SECONDS", 10 * 60))
+
+
+class UploadRejected(ValueError):
+    pass
+
+
+class UnreadableUpload(UploadRejected):
+    """The upload is not a WAV file soundfile can decode."""
+
+
+def check_upload(fileobj, size=None):
+    """Reject an upload from its size and WAV header alone.
+
+    ``size`` defaults to ``fileobj.size`` (Streamlit's ``UploadedFile``).
+    Only the header is parsed; the stream is rewound afterwards.
+    """
+    import soundfile as sf
+
+    size = getattr(fileobj, "size", None) if size is None else size
+    if size is not None and size > MAX_UPLOAD_BYTES:
+        raise UploadRejected(f"File is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    try:
+        info = sf.info(fileobj)
+    except RuntimeError:
+        raise UnreadableUpload("File is not a readable WAV recording") from None
+    finally:
+        fileobj.seek(0)
+    if info.duration > MAX_UPLOAD_SECONDS:
+        raise UploadRejected(f"Recording is longer than {MAX_UPLOAD_SECONDS / 60:g} minutes")
+    return info
+
+
+class FeatureAccumulator:
+    """Running prosodic statistics over VAD-labelled frames."""
+
+    def __init__(self):
+        self.speech_frames = 0
+        self.pause_frames = 0
+        self.pending_silence = 0
+        self.started = False
+        self.rms_sum = 0.0
+        self.onsets = 0
+        self.since_onset = ONSET_GAP
+        self.prev_db = [-120.0, -120.0]
+        # Welford over pitch in semitones
+        self.pitch_n = 0
+        self.pitch_mean = 0.0
+        self.pitch_m2 = 0.0
+
+    def update(self, db, rms, voiced, f0):
+        for t in range(len(db)):
+            if voiced[t]:
+                if self.started:
+                    # Silence between two voiced frames is a pause; trailing silence never lands here
+                    self.pause_frames += self.pending_silence
+                self.started = True
+                self.pending_silence = 0
+                self.speech_frames += 1
+                self.rms_sum += rms[t]
+                if db[t] - self.prev_db[0] > ONSET_DB and self.since_onset >= ONSET_GAP:
+                    self.onsets += 1
+                    self.since_onset = 0
+                if f0 is not None and FMIN <= f0[t] < FMAX:
+                    semitone = 12 * math.log2(f0[t])
+                    self.pitch_n += 1
+                    delta = semitone - self.pitch_mean
+                    self.pitch_mean += delta / self.pitch_n
+                    self.pitch_m2 += delta * (semitone - self.pitch_mean)
+            elif self.started:
+                self.pending_silence += 1
+            self.since_onset += 1
+            self.prev_db = [self.prev_db[1], db[t]]
+
+    def features(self, duration):
+        voiced_seconds = self.speech_frames * HOP_LENGTH / TARGET_SR
+        span = self.speech_frames + self.pause_frames
+        return {
+            'duration': duration,
+            'pause_ratio': self.pause_frames / span if span else 1.0,
+            'speech_rate': self.onsets / voiced_seconds if voiced_seconds else 0.0,
+            'pitch_variability': math.sqrt(self.pitch_m2 / self.pitch_n) if self.pitch_n > 1 else 0.0,
+            'energy_db': 20 * math.log10(self.rms_sum / self.speech_frames + 1e-10) if self.speech_frames else -120.0,
+        }
+
+
+def _open(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+
+def stream_features(source, max_seconds=MAX_UPLOAD_SECONDS):
+    """Compute prosodic features from a WAV file-like object or bytes, block by block."""
+    import numpy as np
+    import soundfile as sf
+    import soxr
+    import librosa
+
+    acc = FeatureAccumulator()
+    noise_floor = None
+    buf = np.zeros(0, dtype=np.float32)
+    with sf.SoundFile(_open(source)) as snd:
+        resampler = soxr.ResampleStream(snd.samplerate, TARGET_SR, 1, dtype='float32') if snd.samplerate != TARGET_SR else None
+        read = 0
+        blocks = snd.blocks(blocksize=BLOCK_FRAMES, dtype='float32', always_2d=True)
+        for block, last in _with_last(blocks):
+            read += len(block)
+            if read / snd.samplerate > max_seconds:
+                raise UploadRejected(f"Recording is longer than {max_seconds / 60:g} minutes")
+            mono = block.mean(axis=1)
+            if resampler is not None:
+                mono = resampler.resample_chunk(mono, last=last)
+            buf = np.concatenate([buf, mono])
+            if len(buf) < FRAME_LENGTH:
+                continue
+            frames = np.lib.stride_tricks.sliding_window_view(buf, FRAME_LENGTH)[::HOP_LENGTH]
+            rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+            db = 20 * np.log10(rms + 1e-10)
+            noise_floor = float(db.min()) if noise_floor is None else min(noise_floor, float(db.min()))
+            voiced = db > max(SILENCE_DB, max(noise_floor, -90.0) + NOISE_MARGIN_DB)
+            f0 = None
+            if voiced.any():
+                f0 = librosa.yin(buf[:(len(frames) - 1) * HOP_LENGTH + FRAME_LENGTH], fmin=FMIN, fmax=FMAX, sr=TARGET_SR, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH, center=False)
+            acc.update(db, rms, voiced, f0)
+            buf = buf[len(frames) * HOP_LENGTH:].copy()
+        duration = read / snd.samplerate
+    return acc.features(duration)
+
+
+def _with_last(iterable):
+    it = iter(iterable)
+    try:
+        prev = next(it)
+    except StopIteration:
+        return
+    for item in it:
+        yield prev, False
+        prev = item
+    yield prev, True
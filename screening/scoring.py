@@ -0,0 +1,106 @@
+"""Per-participant scoring for each assessment modality.
+
+These are the functions the Streamlit app, batch jobs and the HTTP service
+all call; nothing here depends on Streamlit.
+"""
+from . import audio, text
+from .instruments import REGISTRY
+
+
+class SeverityLevel:
+    __slots__ = ("severity", "raw_score", "max_score", "percentage", "threshold", "meets_threshold")
+
+    def __init__(self, severity, raw_score, max_score, percentage, threshold, meets_threshold):
+        self.severity = severity
+        self.raw_score = raw_score
+        self.max_score = max_score
+        self.percentage = percentage
+        self.threshold = threshold
+        self.meets_threshold = meets_threshold
+
+    def __eq__(self, other):
+        return isinstance(other, SeverityLevel) and all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __repr__(self):
+        return "SeverityLevel(" + ", ".join(f"{s}={getattr(self, s)!r}" for s in self.__slots__) + ")"
+
+    def to_dict(self):
+        return {s: getattr(self, s) for s in self.__slots__}
+
+
+def _severity(raw_score, max_score):
+    percentage = (raw_score / max_score) * 100
+    if percentage < 33: return "Low", percentage
+    elif percentage <= 66: return "Medium", percentage
+    else: return "High", percentage
+
+def _level(raw_score, instrument):
+    severity, percentage = _severity(raw_score, instrument.max_score)
+    return SeverityLevel(severity, raw_score, instrument.max_score, percentage, instrument.threshold, raw_score >= instrument.threshold)
+
+# Raw scores are integers in 0..max_score, so every result is precomputed once per process.
+# The SeverityLevel records are shared between sessions and must not be mutated.
+SEVERITY_TABLES = {max_score: tuple(_severity(raw, max_score) for raw in range(max_score + 1)) for max_score in {inst.max_score for inst in REGISTRY}}
+LEVEL_TABLES = {inst.id: tuple(_level(raw, inst) for raw in range(inst.max_score + 1)) for inst in REGISTRY}
+
+def calculate_severity(raw_score, max_score):
+    table = SEVERITY_TABLES.get(max_score)
+    if table is not None and type(raw_score) is int and 0 <= raw_score <= max_score:
+        return table[raw_score]
+    return _severity(raw_score, max_score)
+
+def severity_level(raw_score, instrument):
+    table = LEVEL_TABLES.get(instrument.id)
+    if table is not None and 0 <= raw_score < len(table):
+        return table[raw_score]
+    return _level(raw_score, instrument)
+
+def _by_item_id(responses):
+    # Accept question text or numeric-string keys from older callers and JSON clients
+    return {REGISTRY.resolve(k): v for k, v in responses.items()}
+
+def _fraction_results(fractions):
+    normalized_scores, severity_levels = {}, {}
+    for disorder, fraction in fractions.items():
+        instrument = REGISTRY[disorder]
+        normalized_scores[disorder] = fraction
+        severity_levels[disorder] = severity_level(int(fraction * instrument.max_score), instrument)
+    return normalized_scores, severity_levels
+
+def analyze_questionnaire(responses, selected_assessments):
+    # responses is a registry bytearray; {question: "3 - Often"} dicts are still accepted
+    if isinstance(responses, dict):
+        responses = REGISTRY.encode_labels(responses)
+    normalized_scores, severity_levels = {}, {}
+    for disorder in selected_assessments:
+        instrument = REGISTRY[disorder]
+        raw_score = REGISTRY.raw_score(responses, disorder)
+        normalized_scores[disorder] = raw_score / instrument.max_score
+        severity_levels[disorder] = severity_level(raw_score, instrument)
+    return normalized_scores, severity_levels
+
+def analyze_text_responses(text_responses, selected_assessments):
+    # Lexical features are cached per answer text, so only edited answers are re-analyzed
+    text_responses = _by_item_id(text_responses)
+    fractions = {}
+    for category in selected_assessments:
+        item_ids = REGISTRY[category].item_ids
+        answer_scores = [text.answer_risk(text_responses[i], category) for i in item_ids if text_responses.get(i)]
+        fractions[category] = sum(answer_scores) / len(item_ids)
+    return _fraction_results(fractions)
+
+def analyze_audio_responses(audio_responses, selected_assessments, timeout=audio.COLLECT_TIMEOUT):
+    # Acoustic features come from the process pool, memoized by clip hash. A clip that is
+    # not ready within timeout seconds, or cannot be decoded, raises audio.ClipsIncomplete
+    # rather than scoring as silence.
+    audio_responses = _by_item_id(audio_responses)
+    features, missing = audio.collect({i: audio_responses.get(i) for category in selected_assessments for i in REGISTRY[category].item_ids}, timeout)
+    if missing:
+        raise audio.ClipsIncomplete(missing)
+    fractions = {}
+    for category in selected_assessments:
+        item_ids = REGISTRY[category].item_ids
+        # Unanswered items contribute nothing
+        clip_scores = [audio.clip_risk(features[i], category) for i in item_ids if i in features]
+        fractions[category] = sum(clip_scores) / len(item_ids)
+    return _fraction_results(fractions)
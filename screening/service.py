@@ -0,0 +1,274 @@
+"""Headless HTTP/JSON scoring service.
+
+    python -m screening.service --host 0.0.0.0 --port 8080
+
+Endpoints (all POST bodies are JSON):
+
+    POST /v1/questionnaire  {"responses": {item: 3 or "3 - Often"}, "selected_assessments": [...]}
+    POST /v1/text           {"responses": {item: answer}, "selected_assessments": [...]}
+    POST /v1/audio          {"clips": {item: base64 WAV}, "selected_assessments": [...]}
+    POST /v1/severity       {"raw_score": 12, "max_score": 20}
+    GET  /healthz
+    GET  /metrics           Prometheus text; ?format=json for JSON
+
+Items are keyed by their registry id (``"14"``) or by the question text.
+
+Questionnaire requests arriving within ``BATCH_WINDOW`` seconds are scored
+together with ``batch.score_batch``. Requests beyond ``MAX_INFLIGHT`` are
+shed with 503 and ``Retry-After`` instead of queueing without bound
+(``/healthz`` and ``/metrics`` are never shed), and audio scoring goes
+through the feature-extraction process pool. Clips that are not readable
+WAV get 415; 413 is only for the size and duration limits (and, for text,
+``MAX_ANSWER_CHARS`` per answer and ``MAX_TEXT_CHARS`` per request). Audio that is
+still being analysed after ``AUDIO_TIMEOUT`` gets 503 with ``Retry-After``
+and the pending items, never a score computed without those clips.
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import functools
+import io
+import os
+import time
+
+import numpy as np
+from aiohttp import web
+
+from . import audio, batch, metrics, preprocess
+from .instruments import REGISTRY
+from .scoring import analyze_audio_responses, analyze_text_responses, calculate_severity
+
+MAX_INFLIGHT = int(os.environ.get("SCREENING_MAX_INFLIGHT", 256))
+MAX_AUDIO_JOBS = int(os.environ.get("SCREENING_MAX_AUDIO_JOBS", 8))
+AUDIO_TIMEOUT = float(os.environ.get("SCREENING_AUDIO_TIMEOUT", 30))
+BATCH_WINDOW = 0.005
+BATCH_MAX = 512
+RETRY_AFTER = "1"
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_ANSWER_CHARS = 10000
+MAX_TEXT_CHARS = 200000
+# Liveness checks and metric scrapes must keep answering while the service is saturated
+UNTHROTTLED_PATHS = frozenset(["/healthz", "/metrics"])
+
+
+class QuestionnaireBatcher:
+    """Collects concurrent questionnaire requests and scores them as one matrix."""
+
+    def __init__(self, window=BATCH_WINDOW, max_size=BATCH_MAX):
+        self.window = window
+        self.max_size = max_size
+        self.queue = asyncio.Queue(maxsize=max_size * 4)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def score(self, responses, selected_assessments):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((batch.encode_responses(responses), selected_assessments, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(jobs) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    jobs.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                scored = batch.score_batch(np.vstack([row for row, _, _ in jobs]))
+                for i, (_, selected, future) in enumerate(jobs):
+                    if not future.done():
+                        future.set_result(batch.participant_result(scored, i, selected))
+            except Exception as e:
+                for _, _, future in jobs:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+def _overloaded():
+    return web.json_response({"error": "overloaded"}, status=503, headers={"Retry-After": RETRY_AFTER})
+
+
+@web.middleware
+async def instrument(request, handler):
+    route = request.match_info.route.resource
+    route = route.canonical if route is not None else "unmatched"
+    status = 500
+    t0 = time.perf_counter()
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - t0, route=route, status=status)
+
+
+@web.middleware
+async def backpressure(request, handler):
+    app = request.app
+    if request.path in UNTHROTTLED_PATHS:
+        return await handler(request)
+    if app["inflight"] >= MAX_INFLIGHT:
+        return _overloaded()
+    app["inflight"] += 1
+    try:
+        return await handler(request)
+    finally:
+        app["inflight"] -= 1
+
+
+def _rating(value):
+    if isinstance(value, str):
+        return int(value[0]) if value[:1].isdigit() else None
+    return value
+
+
+async def _payload(request, field, types=(str,)):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="body must be JSON") from None
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="body must be a JSON object")
+    selected = body.get("selected_assessments") or list(REGISTRY.instruments)
+    unknown = [d for d in selected if d not in REGISTRY.instruments]
+    if unknown:
+        raise web.HTTPBadRequest(text=f"unknown assessments: {', '.join(unknown)}")
+    values = body.get(field)
+    if not isinstance(values, dict) or not all(v is None or isinstance(v, types) for v in values.values()):
+        raise web.HTTPBadRequest(text=f"'{field}' must map items to {' or '.join(t.__name__ for t in types)} values")
+    items = {}
+    for key, value in values.items():
+        item_id = REGISTRY.resolve(key)
+        if item_id is None:
+            raise web.HTTPBadRequest(text=f"unknown item {key!r}")
+        items[item_id] = value
+    return items, selected
+
+
+def _result(scores, severity_levels):
+    return web.json_response({"scores": scores, "severity_levels": {d: level.to_dict() for d, level in severity_levels.items()}})
+
+
+async def questionnaire(request):
+    responses, selected = await _payload(request, "responses", (str, int))
+    ratings = {item_id: _rating(value) for item_id, value in responses.items()}
+    if not all(r is None or 0 <= r < len(REGISTRY.scale) for r in ratings.values()):
+        raise web.HTTPBadRequest(text=f"ratings must be between 0 and {len(REGISTRY.scale) - 1}")
+    try:
+        scores, severity_levels = await request.app["batcher"].score(REGISTRY.encode(ratings), selected)
+    except asyncio.QueueFull:
+        return _overloaded()
+    return _result(scores, severity_levels)
+
+
+async def text_responses(request):
+    responses, selected = await _payload(request, "responses")
+    answers = [a for a in responses.values() if a]
+    longest, total = max(map(len, answers), default=0), sum(map(len, answers))
+    if longest > MAX_ANSWER_CHARS or total > MAX_TEXT_CHARS:
+        limit, actual = (MAX_ANSWER_CHARS, longest) if longest > MAX_ANSWER_CHARS else (MAX_TEXT_CHARS, total)
+        raise web.HTTPRequestEntityTooLarge(max_size=limit, actual_size=actual, text=f"answers are limited to {MAX_ANSWER_CHARS} characters each and {MAX_TEXT_CHARS} in total")
+    # The lexicon regex pass is CPU-bound, so keep it off the event loop
+    scores, severity_levels = await asyncio.get_running_loop().run_in_executor(None, analyze_text_responses, responses, selected)
+    return _result(scores, severity_levels)
+
+
+async def audio_responses(request):
+    encoded, selected = await _payload(request, "clips")
+    clips = {}
+    for item_id, value in encoded.items():
+        try:
+            clips[item_id] = base64.b64decode(value, validate=True)
+            preprocess.check_upload(io.BytesIO(clips[item_id]), size=len(clips[item_id]))
+        except (binascii.Error, TypeError):
+            raise web.HTTPBadRequest(text=f"clip for item {item_id} is not base64") from None
+        except preprocess.UnreadableUpload as e:
+            raise web.HTTPUnsupportedMediaType(text=f"clip for item {item_id}: {e}") from None
+        except preprocess.UploadRejected as e:
+            # Size and duration limits
+            raise web.HTTPRequestEntityTooLarge(max_size=preprocess.MAX_UPLOAD_BYTES, actual_size=len(clips[item_id]), text=str(e)) from None
+    async with request.app["audio_slots"]:
+        # analyze_audio_responses blocks on the process pool, so keep it off the event loop
+        try:
+            scores, severity_levels = await asyncio.get_running_loop().run_in_executor(None, functools.partial(analyze_audio_responses, clips, selected, timeout=AUDIO_TIMEOUT))
+        except audio.ClipsIncomplete as e:
+            if e.failed:
+                raise web.HTTPUnsupportedMediaType(text=f"clips could not be decoded for items: {', '.join(map(str, e.failed))}") from None
+            # Finished clips are cached, so a retry only waits on these
+            return web.json_response({"error": "audio not ready", "pending": e.pending}, status=503, headers={"Retry-After": RETRY_AFTER})
+    return _result(scores, severity_levels)
+
+
+async def severity(request):
+    try:
+        body = await request.json()
+        raw_score, max_score = body["raw_score"], body["max_score"]
+        label, percentage = calculate_severity(raw_score, max_score)
+    except (ValueError, KeyError, TypeError, ZeroDivisionError):
+        raise web.HTTPBadRequest(text="expected numeric raw_score and non-zero max_score") from None
+    return web.json_response({"severity": label, "percentage": percentage})
+
+
+async def healthz(request):
+    return web.json_response({"status": "ok", "inflight": request.app["inflight"]})
+
+
+async def metrics_endpoint(request):
+    if request.query.get("format") == "json":
+        return web.json_response(metrics.snapshot())
+    return web.Response(text=metrics.prometheus_text(), content_type="text/plain")
+
+
+async def _startup(app):
+    app["batcher"].start()
+
+
+async def _cleanup(app):
+    await app["batcher"].stop()
+
+
+def create_app():
+    app = web.Application(middlewares=[instrument, backpressure], client_max_size=MAX_BODY_BYTES)
+    app["inflight"] = 0
+    app["batcher"] = QuestionnaireBatcher()
+    app["audio_slots"] = asyncio.Semaphore(MAX_AUDIO_JOBS)
+    app.on_startup.append(_startup)
+    app.on_cleanup.append(_cleanup)
+    app.add_routes([
+        web.post("/v1/questionnaire", questionnaire),
+        web.post("/v1/text", text_responses),
+        web.post("/v1/audio", audio_responses),
+        web.post("/v1/severity", severity),
+        web.get("/healthz", healthz),
+        web.get("/metrics", metrics_endpoint),
+    ])
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the headless scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Lexical features for free-text answers.
+
+All lexicons are compiled into one alternation regex per process, so a
+single ``finditer`` pass tags every hit with its lexicon. Features are
+memoized by the answer's SHA-256, so editing one answer only re-analyzes
+that one and the memo never holds answer text.
+"""
+import functools
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from .instruments import REGISTRY
+
+# Entries ending in "*" match any word starting with that stem.
+LEXICONS = {
+    'negative_affect': ["sad*", "hopeless*", "empty", "numb", "worthless*", "fail*", "tired", "exhaust*", "lonely", "alone", "guilt*", "cry*", "miserable", "depress*", "unhappy", "pointless", "useless", "hate", "awful", "terrible", "down", "low", "drained", "nothing", "never"],
+    'anxiety': ["worr*", "anxi*", "nervous*", "panic*", "afraid", "fear*", "scared", "tense", "stress*", "overwhelm*", "restless*", "uneasy", "dread*", "avoid*", "overthink*", "racing", "sweat*", "shak*", "edge"],
+    'attention': ["distract*", "forget*", "forgot*", "focus*", "procrastinat*", "late", "deadline*", "lose", "losing", "lost", "disorgani*", "mess*", "bored", "boring", "careless*", "mistake*", "impulsive*", "interrupt*", "fidget*", "zone", "daydream*"],
+    'social': ["awkward*", "misunderst*", "confus*", "joke*", "sarcas*", "hint*", "cue*", "tone", "rude", "blunt", "conversation*", "small talk", "eye contact", "literal*", "routine*", "rules", "predictab*", "group*", "turn"],
+}
+FIRST_PERSON = frozenset(["i", "me", "my", "mine", "myself", "i'm", "i've", "i'd", "i'll"])
+
+# Heuristic marker weights per disorder (from the instrument definition) until a trained model replaces them.
+TEXT_MARKERS = {inst.id: inst.text_markers for inst in REGISTRY}
+MARKER_NAMES = frozenset(LEXICONS) | {'self_focus', 'low_diversity'}
+_unknown = {m for weights in TEXT_MARKERS.values() for m in weights} - MARKER_NAMES
+if _unknown:
+    raise ValueError(f"unknown text markers in instrument definition: {', '.join(sorted(_unknown))}")
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+CACHE_SIZE = 4096
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+def _pattern(words):
+    parts = [re.escape(w[:-1]) + r"[a-z']*" if w.endswith("*") else re.escape(w) for w in words]
+    return r"\b(?:" + "|".join(sorted(parts, key=len, reverse=True)) + r")\b"
+
+
+@functools.lru_cache(maxsize=1)
+def matcher():
+    """Compile every lexicon into one regex with a named group per lexicon."""
+    return re.compile("|".join(f"(?P<{name}>{_pattern(words)})" for name, words in LEXICONS.items()))
+
+
+def answer_features(text):
+    """Token count, lexicon hits, first-person rate and type/token ratio for one answer."""
+    key = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+    features = _answer_features(text)
+    with _lock:
+        _cache[key] = features
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return features
+
+
+def cache_clear():
+    with _lock:
+        _cache.clear()
+
+
+def _answer_features(text):
+    text = text.lower()
+    tokens = TOKEN_RE.findall(text)
+    features = dict.fromkeys(LEXICONS, 0)
+    for match in matcher().finditer(text):
+        features[match.lastgroup] += 1
+    n = len(tokens)
+    features['tokens'] = n
+    features['first_person_rate'] = sum(t in FIRST_PERSON for t in tokens) / n if n else 0.0
+    features['type_token_ratio'] = len(set(tokens)) / n if n else 0.0
+    return features
+
+
+def _clip01(x):
+    return min(max(x, 0.0), 1.0)
+
+
+def answer_markers(features):
+    """Map raw features onto 0-1 markers used by ``TEXT_MARKERS``."""
+    n = features['tokens'] or 1
+    markers = {name: _clip01(features[name] / n * 10) for name in LEXICONS}
+    markers['self_focus'] = _clip01((features['first_person_rate'] - 0.05) / 0.10)
+    markers['low_diversity'] = _clip01((0.7 - features['type_token_ratio']) / 0.4) if features['tokens'] else 0.0
+    return markers
+
+
+def answer_risk(text, disorder):
+    markers = answer_markers(answer_features(text))
+    return sum(w * markers[m] for m, w in TEXT_MARKERS[disorder].items())